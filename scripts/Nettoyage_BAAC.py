@@ -5,238 +5,189 @@ import pandas as pd
 import numpy as np
 import os
 import re
+import sys
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cache_baac import cle_etape, ecrire_manifeste, empreinte_code, empreinte_fichier, etape_a_jour, lire_manifeste
+from lecture_baac import lire_csv_brut, lire_csv_brut_par_blocs
+from etoile_baac import TABLE_FAITS, joindre_partition, afficher_rapport_jointure, construire_faits, positions_dimension
+from schema_baac import vers_pandas
+from stockage_baac import FORMAT_EXPORT, exporter_par_blocs, exporter_table, lire_table
+from profil_baac import afficher_profil, ecrire_profil, profiler_table
+from regles_baac import afficher_rapport_regles, valider_table
+from variables_derivees import ajouter_variables
 
 # =====================================================================
 # CHARGEMENT DES DONNÉES BRUTES 
 # =====================================================================
-caract_2023 = pd.read_csv("caract-2023.csv", sep=";")
-lieux_2023 = pd.read_csv("lieux-2023.csv", sep=";")
-usagers_2023 = pd.read_csv("usagers-2023.csv", sep=";")
-vehicules_2023 = pd.read_csv("vehicules-2023.csv", sep=";")
+DOSSIER_BRUT = "."
+DOSSIER_SORTIE = "clean/baac"
+ANNEES = [2023]
 
-# =====================================================================
-# DIAGNOSTIC CARACTÉRISTIQUES 2023
-# =====================================================================
-def diagnostic(df, year):
-    print(f"\n=== DIAGNOSTIC CARACT {year} ===")
-    print(f"Lignes : {df.shape[0]}")
-    print(f"Colonnes : {df.shape[1]}")
-    print("Valeurs manquantes :")
-    print(df.isna().sum())
-    print("Doublons Num_Acc :", df["Num_Acc"].duplicated().sum())
+# Les noms de fichiers publiés sur data.gouv.fr varient selon les millésimes
+FICHIERS_BRUTS = {
+    "caract": ["caract-{annee}.csv", "caracteristiques-{annee}.csv", "carcteristiques-{annee}.csv", "caracteristiques_{annee}.csv"],
+    "lieux": ["lieux-{annee}.csv", "lieux_{annee}.csv"],
+    "usagers": ["usagers-{annee}.csv", "usagers_{annee}.csv"],
+    "vehicules": ["vehicules-{annee}.csv", "vehicules_{annee}.csv"],
+}
 
-    print("Vérification jour/mois/an :")
-    print("Jour hors plage :", df[(df['jour'] < 1) | (df['jour'] > 31)].shape[0])
-    print("Mois hors plage :", df[(df['mois'] < 1) | (df['mois'] > 12)].shape[0])
-    print("Année incohérente :", df[df['an'] != int(year)].shape[0], "\n")
 
-    bad_hrmn = df[~df['hrmn'].astype(str).str.match(r'^\d{1,2}:\d{2}$', na=False)]
-    print("Heures/minutes incorrectes :", len(bad_hrmn))
+def chemin_brut(table, annee, dossier=DOSSIER_BRUT):
+    for modele in FICHIERS_BRUTS[table]:
+        chemin = os.path.join(dossier, modele.format(annee=annee))
+        if os.path.exists(chemin):
+            return chemin
+    raise FileNotFoundError(f"Fichier {table} {annee} introuvable dans {dossier}")
 
-    print("lat avec virgule :", df['lat'].astype(str).str.contains(",").sum())
-    print("long avec virgule :", df['long'].astype(str).str.contains(",").sum(), "\n")
 
-diagnostic(caract_2023, "2023")
-
-# =====================================================================
-# NETTOYAGE CARACTÉRISTIQUES 2023
-# =====================================================================
+def format_brut(chemin):
+    """Séparateur et encodage d'un fichier brut."""
+    entete = pd.read_csv(chemin, sep=";", nrows=0, encoding="latin-1").columns
+    # Anciens millésimes (avant 2019) : séparateur virgule et encodage latin-1
+    if len(entete) == 1:
+        return {"sep": ",", "encoding": "latin-1"}
+    return {"sep": ";", "encoding": "utf-8"}
 
-def nettoyer_caracteristiques(df):
-    df = df.copy()
 
-    # Correction lat / long (virgule -> point)
-    df["lat"] = (df["lat"].astype(str).str.replace(",", ".", regex=False).astype(float))
-    df["long"] = (df["long"].astype(str) .str.replace(",", ".", regex=False) .astype(float) )
-
-    # Colonnes numériques à convertir
-    cols_num = ["jour", "mois", "an", "hrmn", "lum", "agg", "int", "atm", "col"]
-
-    for col in cols_num:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Bornes issues de la documentation BAAC
-    plage = {
-        "jour": (1, 31),
-        "mois": (1, 12),
-        "an": (1900, 2100),
-        "hrmn": (0, 2359),
-        "lum": (1, 5),
-        "agg": (1, 2),
-        "int": (1, 8),
-        "atm": (1, 9),
-        "col": (1, 7)
-    }
+def charger_table_brute(table, annee, dossier=DOSSIER_BRUT, colonnes=None):
+    chemin = chemin_brut(table, annee, dossier)
+    return lire_csv_brut(chemin, table, colonnes=colonnes, **format_brut(chemin))
 
-    for col, (minv, maxv) in plage.items():
-        df.loc[(df[col] < minv) | (df[col] > maxv), col] = np.nan
 
-    cols_int = ["jour", "mois", "an", "hrmn", "lum", "agg", "int", "atm", "col"]
+def normaliser_caract(df):
+    """Aligne les anciens formats sur 2023 : heure "HH:MM", année sur 4 chiffres et coordonnées en degrés."""
+    df = df.copy()
+    hrmn = df["hrmn"].astype("string")
+    hrmn_4 = hrmn.str.zfill(4)
+    avec_separateur = hrmn.str.contains(":", regex=False).fillna(True)
+    hrmn = hrmn.where(avec_separateur, hrmn_4.str[:2] + ":" + hrmn_4.str[2:])
+    # Le moteur pyarrow lit "21:14" comme une heure et la restitue en "21:14:00"
+    df["hrmn"] = hrmn.str.replace(r"^(\d{1,2}:\d{2}):\d{2}$", r"\1", regex=True).str.zfill(5)
+    an = pd.to_numeric(df["an"], errors="coerce")
+    df["an"] = an.where(an >= 100, an + 2000)
+    # Avant 2019 (colonne gps) : coordonnées entières en degrés x 100 000
+    if "gps" in df.columns:
+        for col in ["lat", "long"]:
+            df[col] = convertir_coordonnee(df[col]) / 100_000
+    return df
 
-    for col in cols_int:
-        df[col] = df[col].astype("Int64")
 
+def normaliser_lieux(df):
+    """Aligne les anciens formats sur 2023 : la vitesse maximale autorisée (vma) n'existe que depuis 2019."""
+    if "vma" not in df.columns:
+        df = df.copy()
+        df["vma"] = pd.array([pd.NA] * len(df), dtype="Int16")
     return df
 
-
 # =====================================================================
-# DIAGNOSTIC LIEUX 2023
+# NETTOYAGE CARACTÉRISTIQUES
 # =====================================================================
-def diagnostic_lieux(df, year):
-    print(f"\n=== DIAGNOSTIC LIEUX {year} ===")
-    print(df.info())
-    print("Valeurs manquantes :")
-    print(df.isna().sum())
-    print("Doublons Num_Acc :", df["Num_Acc"].duplicated().sum())
 
-diagnostic_lieux(lieux_2023, "2023")
-
-# =====================================================================
-# NETTOYAGE LIEUX 2023
-# =====================================================================
-def nettoyer_lieux(df):
-    df = df.copy()
-    cols = ["voie", "v2", "nbv", "pr", "pr1", "lartpc", "larrout"]
-    for col in cols:
-        df[col] = df[col].replace({"": np.nan, " ": np.nan})
-
-    for col in ["voie", "v2", "nbv", "pr", "pr1", "larrout"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-# Bornes issues de la documentation BAAC
-    plage = {
-        "catr": (1, 9),
-        "circ": (1, 9),
-        "prof": (0, 9),
-        "plan": (1, 9),
-        "surf": (1, 9),
-        "infra": (0, 9),
-        "situ": (1, 8),
-        "vma": (0, 150)
-    }
+# Emprises (lat_min, lat_max, long_min, long_max) de la métropole et des
+# outre-mer couverts par le fichier BAAC
+EMPRISES_FRANCE = {
+    "metropole": (41.0, 51.5, -5.5, 10.0),
+    "antilles": (14.0, 18.5, -63.5, -60.5),
+    "guyane": (2.0, 6.0, -55.0, -51.0),
+    "reunion": (-21.5, -20.8, 55.0, 56.0),
+    "mayotte": (-13.1, -12.5, 44.9, 45.4),
+    "saint_pierre_miquelon": (46.7, 47.2, -56.5, -56.0),
+    "nouvelle_caledonie": (-23.0, -19.0, 163.0, 169.0),
+    "polynesie": (-28.0, -7.0, -155.0, -134.0),
+    "wallis_futuna": (-14.5, -13.0, -178.5, -176.0),
+}
+
+
+def convertir_coordonnee(serie):
+    """Convertit une colonne lat / long en float32 (virgule décimale acceptée, NaN si illisible)."""
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = serie.astype("string").str.replace(",", ".", regex=False)
+    return pd.to_numeric(serie, errors="coerce").astype("float32")
+
+
+def nettoyer_coordonnees(df):
+    """
+    Coordonnées en float32 et indicateur coord_valide : renseignées, non
+    nulles et situées dans une des EMPRISES_FRANCE (calcul vectorisé).
+    """
+    for col in ["lat", "long"]:
+        df[col] = convertir_coordonnee(df[col])
+
+    lat = df["lat"].to_numpy()
+    lon = df["long"].to_numpy()
+    dans_emprise = np.zeros(len(df), dtype=bool)
+    for lat_min, lat_max, lon_min, lon_max in EMPRISES_FRANCE.values():
+        dans_emprise |= (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+    # (0, 0) et les NaN sont déjà exclus par les emprises
+    df["coord_valide"] = dans_emprise
+    return df
 
-    for col, (minv, maxv) in plage.items():
-        df.loc[(df[col] < minv) | (df[col] > maxv), col] = np.nan
 
-    cols_int = [
-        "catr", "circ", "nbv", "prof", "surf", "infra", "situ", "vma"
-    ]
+def nettoyer_caracteristiques(df, afficher=True):
+    df = df.copy()
 
-    for col in cols_int:
-        df[col] = df[col].astype("Int64")
+    # Correction lat / long (virgule -> point) et contrôle de l'emprise
+    nettoyer_coordonnees(df)
 
+    # Conversion numérique, bornes BAAC et format de l'heure (regles_baac.py)
+    df, rapport = valider_table(df, "caract")
+    if afficher:
+        afficher_rapport_regles("caract", rapport)
     return df
 
-lieux_2023_clean = nettoyer_lieux(lieux_2023)
-
-# =====================================================================
-# DIAGNOSTIC USAGERS 2023
-# =====================================================================
-def diagnostic_usagers(df, year):
-    print(f"\n=== DIAGNOSTIC USAGERS {year} ===\n")
-    print(df.info())
-    print("\nValeurs manquantes :\n", df.isna().sum())
-    print("Doublons Num_Acc + id_usager :", df.duplicated(subset=["Num_Acc", "id_usager"]).sum(), "\n")
-
-diagnostic_usagers(usagers_2023, "2023")
 
 # =====================================================================
-# NETTOYAGE USAGERS 2023
+# NETTOYAGE LIEUX
 # =====================================================================
-def nettoyer_usagers(df):
-    df = df.copy()
-    df["id_vehicule"] = df["id_vehicule"].astype(str).str.replace(" ", "").str.replace("\xa0", "")
-    df["id_usager"] = df["id_usager"].astype(str).str.replace(" ", "").str.replace("\xa0", "")
-
-    aberrants = [-1, 0, 99, 999, "99", "0"]
-
-    for col in df.columns:
-        df[col] = df[col].replace(aberrants, np.nan)
-
-# Bornes issues de la documentation BAAC
-    plages = {
-        "sexe": (1, 2),
-        "grav": (1, 4),
-        "trajet": (1, 9),
-        "locp": (1, 9),
-        "actp": (1, 13),
-        "place": (1, 9)
-    }
-
-    for col, (minv, maxv) in plages.items():
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-        df.loc[(df[col] < minv) | (df[col] > maxv), col] = np.nan
-    
-    cols_int = [
-        "Num_Acc","id_usager","place","catu","grav","sexe","an_nais","trajet"
-
-    ]
-
-    for col in cols_int:
-        df[col] = df[col].astype("Int64")
-    
+def nettoyer_lieux(df, afficher=True):
+    # Champs vides déjà lus comme NA (lecture_baac.VALEURS_MANQUANTES) ;
+    # conversions et bornes BAAC déclarées dans regles_baac.py
+    df, rapport = valider_table(df, "lieux")
+    if afficher:
+        afficher_rapport_regles("lieux", rapport)
     return df
 
-usagers_2023_clean = nettoyer_usagers(usagers_2023)
 
 # =====================================================================
-# DIAGNOSTIC VEHICULES 2023
+# NETTOYAGE USAGERS
 # =====================================================================
-def diagnostic_vehicules(df, year):
-    print(f"\n=== DIAGNOSTIC VEHICULES {year} ===\n")
-    print(df.info())
-    print("Doublons Num_Acc + id_vehicule :", df.duplicated(subset=["Num_Acc", "id_vehicule"]).sum())
+def nettoyer_usagers(df, afficher=True):
+    # Identifiants déjà normalisés à la lecture (lecture_baac.normaliser_identifiants) ;
+    # codes aberrants et bornes BAAC déclarés dans regles_baac.py
+    df, rapport = valider_table(df, "usagers")
+    if afficher:
+        afficher_rapport_regles("usagers", rapport)
+    return df
 
-diagnostic_vehicules(vehicules_2023, "2023")
 
 # =====================================================================
-# NETTOYAGE VÉHICULES 2023
+# NETTOYAGE VÉHICULES
 # =====================================================================
-def nettoyer_vehicules(df):
-    df = df.copy()
-    df["id_vehicule"] = df["id_vehicule"].astype(str).str.replace(" ", "").str.replace("\xa0", "")
-
-    aberrants = [-1, 0, 999, "0"] # ici pas de 99 car la catégorie autres de catv va jusqu'à 99
-
-    for col in df.columns:
-        df[col] = df[col].replace(aberrants, np.nan)
-
-# Bornes issues de la documentation BAAC
-    plages = {
-        "senc": (1, 3),
-        "catv": (1, 99),
-        "choc": (1, 9),
-        "manv": (1, 26),
-        "motor": (1, 6)
-    }
-
-    for col, (minv, maxv) in plages.items():
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-        df.loc[(df[col] < minv) | (df[col] > maxv), col] = np.nan
-
-    cols_int = [
-        "senc", "catv", "choc", "manv", "motor"
-    ]
-
-    for col in cols_int:
-        df[col] = df[col].astype("Int64")
+def nettoyer_vehicules(df, afficher=True):
+    # Identifiant déjà normalisé à la lecture (lecture_baac.normaliser_identifiants) ;
+    # codes aberrants et bornes BAAC déclarés dans regles_baac.py
+    df, rapport = valider_table(df, "vehicules")
+    if afficher:
+        afficher_rapport_regles("vehicules", rapport)
     return df
 
-vehicules_2023_clean = nettoyer_vehicules(vehicules_2023)
 
 # =====================================================================
 # SUPPRESSION COLONNES INUTILES
 # =====================================================================
 
-### ---- CARACT 2023 ----
+### ---- CARACT ----
 cols_drop_caract = [
     "dep", "com", "int",   
-    "adr"                           
+    "adr",
+    "gps"
 ]
-caract_2023.drop(columns=cols_drop_caract, inplace=True, errors="ignore")
 
 
-### ---- LIEUX 2023 ----
+### ---- LIEUX ----
 cols_drop_lieux = [
     "voie",      
     "v1",        
@@ -244,147 +195,300 @@ cols_drop_lieux = [
     "v2",
     "lartpc",
     "plan",
-    "pr","pr1" 
+    "pr","pr1",
+    "env1"
      
 ]
-lieux_2023_clean.drop(columns=cols_drop_lieux, inplace=True, errors="ignore")
 
 
-### ---- USAGERS 2023 ----
+### ---- USAGERS ----
+# num_veh est conservé : clé de jointure usager -> véhicule avant 2019
+# (sans id_vehicule), retiré des faits une fois la jointure faite
 cols_drop_usagers = [
-    "num_veh",
     "trajet",
     "locp",
     "actp",
     "etatp",
     "secu1", "secu2", "secu3"  
 ]
-usagers_2023_clean.drop(columns=cols_drop_usagers, inplace=True, errors="ignore")
 
 
-### ---- VÉHICULES 2023 ----
+### ---- VÉHICULES ----
 cols_drop_veh = [
     "motor",
-    "num_veh",
     "obs",
     "obsm",
     "manv",
     "occutc"     
 ]
-vehicules_2023_clean.drop(columns=cols_drop_veh, inplace=True, errors="ignore")
-# =====================================================================
-# AJOUT DE VARIABLES SUPPLÉMENTAIRES 
-# =====================================================================
-def periode_journee(h):
-    if "00:00" <= h < "06:00":
-        return "Nuit"
-    elif "06:00" <= h < "12:00":
-        return "Matin"
-    elif "12:00" <= h < "18:00":
-        return "Après-midi"
-    else:
-        return "Soir"
-
-caract_2023["periode"] = caract_2023["hrmn"].apply(periode_journee)
-
-
-def gravite_3_niveaux(grav):
-    if pd.isna(grav):
-        return None
-    elif grav == 2:
-        return "Tué"
-    elif grav == 3:
-        return "Blessé hospitalisé"
-    elif grav in [1, 4]:
-        return "Indemne"
-    else:
-        return None
-usagers_2023_clean["grav_3_niveaux"] = usagers_2023_clean["grav"].apply(gravite_3_niveaux)
-
-# 
-usagers_2023_clean["age"] = 2023 - usagers_2023_clean["an_nais"]
-
-def tranche_age(a):
-    if pd.isna(a): 
-        return None
-    elif a < 18:
-        return "Mineur"
-    elif a < 25:
-        return "18–24"
-    elif a < 40:
-        return "25–39"
-    elif a < 60:
-        return "40–59"
-    else:
-        return "60+"
-
-usagers_2023_clean["tranche_age"] = usagers_2023_clean["age"].apply(tranche_age)
-
-# Fusion de la variable agg (table caractéristiques) dans la table lieux
-
-lieux_2023_clean = lieux_2023_clean.merge(
-    caract_2023[["Num_Acc", "agg"]],
-    on="Num_Acc",
-    how="left"
-)
-
-def zone_detaillee(agg, catr, vma):
-    if pd.isna(agg) or pd.isna(vma):
-        return None
-    elif catr == 1 or vma >= 90:
-        return "Autoroute"
-    elif agg == 2 and vma <= 50:
-        return "Zone urbaine dense"
-    elif agg == 1 and vma <= 80:
-        return "Zone rurale"
-    else:
-        return "Autre"
-
-lieux_2023_clean["zone_detaillee"] = lieux_2023_clean.apply(
-    lambda x: zone_detaillee(x["agg"], x["catr"], x["vma"]),
-    axis=1
-)
-
-def niveau_vitesse(v):
-    if pd.isna(v):
-        return None
-    elif v <= 30:
-        return "Faible"
-    elif v <= 70:
-        return "Moyenne"
-    else:
-        return "Élevée"
-lieux_2023_clean["niveau_vitesse"] = lieux_2023_clean["vma"].apply(niveau_vitesse)
 
 # =====================================================================
-# EXPORT FINAL 2023
+# ÉTAPES DE NETTOYAGE (UNE PAR TABLE)
 # =====================================================================
-os.makedirs("clean", exist_ok=True)
+def profiler_brut(df, table, annee):
+    """Profil qualité de la table brute (manquants, modalités, bornes, doublons), affiché."""
+    profil = profiler_table(df, table, annee)
+    afficher_profil(profil)
+    return profil
+
+
+def etape_caract(annee, dossier_brut):
+    caract = normaliser_caract(charger_table_brute("caract", annee, dossier_brut))
+    profil = profiler_brut(caract, "caract", annee)
+    caract.drop(columns=cols_drop_caract, inplace=True, errors="ignore")
+    caract = nettoyer_caracteristiques(caract)
+
+    # Définitions (bornes / conditions) dans variables_derivees.py,
+    # calculées colonne entière et stockées directement en category
+    ajouter_variables(caract, ["periode"])
+    return caract, profil
+
+
+def etape_lieux(annee, dossier_brut):
+    lieux = normaliser_lieux(charger_table_brute("lieux", annee, dossier_brut))
+    profil = profiler_brut(lieux, "lieux", annee)
+    lieux_clean = nettoyer_lieux(lieux)
+    lieux_clean.drop(columns=cols_drop_lieux, inplace=True, errors="ignore")
+
+    # Report de la variable agg (table caractéristiques) dans la table lieux,
+    # par jointure triée sur Num_Acc (sans risque d'éclatement des lignes).
+    # Seules ces deux colonnes du fichier brut caract sont relues : l'étape
+    # reste indépendante de etape_caract et peut tourner en parallèle.
+    caract, _ = valider_table(
+        charger_table_brute("caract", annee, dossier_brut, colonnes=["Num_Acc", "agg"]),
+        "caract",
+    )
+    positions, rapport = positions_dimension(caract, lieux_clean, ["Num_Acc"])
+    afficher_rapport_jointure("lieux -> caract", rapport)
+    lieux_clean["agg"] = caract["agg"].array.take(positions.to_numpy(dtype="int64", na_value=-1), allow_fill=True)
+
+    ajouter_variables(lieux_clean, ["zone_detaillee", "niveau_vitesse"])
+    return lieux_clean, profil
+
 
-caract_2023.to_csv("clean/caract_2023_clean.csv", index=False)
-lieux_2023_clean.to_csv("clean/lieux_2023_clean.csv", index=False)
-usagers_2023_clean.to_csv("clean/usagers_2023_clean.csv", index=False)
-vehicules_2023_clean.to_csv("clean/vehicules_2023_clean.csv", index=False)
+def preparer_usagers(usagers, annee, afficher=True):
+    usagers_clean = nettoyer_usagers(usagers, afficher)
+    usagers_clean.drop(columns=cols_drop_usagers, inplace=True, errors="ignore")
 
-# MERGE FINAL 2023
-df_2023 = (
-    caract_2023
-        .merge(lieux_2023_clean, on="Num_Acc", how="left")
-        .merge(vehicules_2023_clean, on="Num_Acc", how="left")
-        .merge(usagers_2023_clean, on=["Num_Acc", "id_vehicule"], how="left")
-)
+    ajouter_variables(usagers_clean, ["grav_3_niveaux"])
+    usagers_clean["age"] = annee - usagers_clean["an_nais"]
+    ajouter_variables(usagers_clean, ["tranche_age"])
+    return usagers_clean
 
-df_2023.to_csv("clean/final_2023.csv", index=False)
 
-print("Informations finales après nettoyage :\n")
-caract_2023.info()
-caract_2023.isna().mean()
+def preparer_vehicules(vehicules, annee, afficher=True):
+    vehicules_clean = nettoyer_vehicules(vehicules, afficher)
+    vehicules_clean.drop(columns=cols_drop_veh, inplace=True, errors="ignore")
+    return vehicules_clean
 
-lieux_2023_clean.info()
-lieux_2023_clean.isna().mean()
 
-usagers_2023_clean.info()
-usagers_2023_clean.isna().mean()
+def etape_usagers(annee, dossier_brut):
+    usagers = charger_table_brute("usagers", annee, dossier_brut)
+    profil = profiler_brut(usagers, "usagers", annee)
+    return preparer_usagers(usagers, annee), profil
 
-vehicules_2023_clean.info()
-vehicules_2023_clean.isna().mean()
+
+def etape_vehicules(annee, dossier_brut):
+    vehicules = charger_table_brute("vehicules", annee, dossier_brut)
+    profil = profiler_brut(vehicules, "vehicules", annee)
+    return preparer_vehicules(vehicules, annee), profil
+
+
+# Usagers et véhicules n'ont que des règles ligne à ligne (bornes, codes
+# aberrants, variables dérivées) : ils peuvent être nettoyés bloc par bloc
+PREPARATIONS_PAR_BLOCS = {
+    "usagers": preparer_usagers,
+    "vehicules": preparer_vehicules,
+}
+
+
+def etape_par_blocs(table, annee, dossier_brut, chemin_sortie, taille_bloc, format_export=FORMAT_EXPORT):
+    """
+    Mode streaming : lit la table brute par blocs, applique les mêmes
+    règles de nettoyage à chaque bloc et l'ajoute au fichier de sortie.
+    La mémoire utilisée dépend de taille_bloc, pas de la taille du fichier.
+    Les profils et rapports de règles, qui portent sur la table entière, ne sont pas affichés.
+    """
+    chemin = chemin_brut(table, annee, dossier_brut)
+    blocs = lire_csv_brut_par_blocs(chemin, table, taille_bloc, **format_brut(chemin))
+
+    preparer = PREPARATIONS_PAR_BLOCS[table]
+    exporter_par_blocs((preparer(bloc, annee, afficher=False) for bloc in blocs), chemin_sortie, format_export)
+
+
+# =====================================================================
+# TRAITEMENT D'UNE ANNÉE (RECONSTRUCTION INCRÉMENTALE)
+# =====================================================================
+# Faits et dimensions, lus par l'application, sont écrits en Arrow IPC pour
+# être projetés en mémoire ; la table usagers intermédiaire reste en Parquet
+FORMATS_ETAPES = {
+    "caract": "arrow",
+    "lieux": "arrow",
+    "vehicules": "arrow",
+    TABLE_FAITS: "arrow",
+}
+
+def modules_pipeline():
+    """Fichiers source de ce script et des modules du dossier scripts qu'il a importés."""
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    fichiers = {os.path.abspath(__file__)}
+    for module in list(sys.modules.values()):
+        chemin = getattr(module, "__file__", None)
+        if chemin and os.path.dirname(os.path.abspath(chemin)) == dossier:
+            fichiers.add(os.path.abspath(chemin))
+    return sorted(fichiers)
+
+
+# Toute modification de ces fichiers invalide le cache de toutes les étapes.
+# La liste suit les imports : un nouveau module du pipeline y entre d'office.
+FICHIERS_CODE = modules_pipeline()
+
+
+# Étapes par table : indépendantes les unes des autres jusqu'aux faits
+ETAPES_TABLES = {
+    "caract": etape_caract,
+    "lieux": etape_lieux,
+    "usagers": etape_usagers,
+    "vehicules": etape_vehicules,
+}
+
+
+def chemin_partition(dossier_sortie, annee):
+    return os.path.join(dossier_sortie, f"annee={annee}")
+
+
+def cles_annee(annee, dossier_brut):
+    """Clé de cache de chaque étape d'une année (fichier brut, code et dépendances)."""
+    version = empreinte_code(FICHIERS_CODE)
+    cles = {
+        table: cle_etape(table, annee, version, empreinte_fichier(chemin_brut(table, annee, dossier_brut)))
+        for table in ETAPES_TABLES
+    }
+    # La table lieux reçoit agg depuis caract : elle dépend aussi de son fichier brut
+    cles["lieux"] = cle_etape(cles["lieux"], cles["caract"])
+    cles[TABLE_FAITS] = cle_etape(*(cles[table] for table in ETAPES_TABLES))
+    return cles
+
+
+def executer_etape(nom, annee, dossier_brut, dossier_sortie, taille_bloc=None):
+    """
+    Calcule une table nettoyée d'une année et l'écrit dans sa partition.
+    Exécutée dans un processus du pool : seul le nom de l'étape revient.
+    """
+    chemin = os.path.join(chemin_partition(dossier_sortie, annee), nom)
+    if taille_bloc and nom in PREPARATIONS_PAR_BLOCS:
+        etape_par_blocs(nom, annee, dossier_brut, chemin, taille_bloc, FORMATS_ETAPES.get(nom, FORMAT_EXPORT))
+        return annee, nom
+
+    table, profil = ETAPES_TABLES[nom](annee, dossier_brut)
+    exporter_table(table, chemin, FORMATS_ETAPES.get(nom, FORMAT_EXPORT))
+    ecrire_profil(profil, chemin_partition(dossier_sortie, annee), f"{nom}_brut")
+    print(f"Informations après nettoyage ({nom} {annee}) :\n")
+    table.info()
+    return annee, nom
+
+
+def executer_faits(annee, dossier_sortie):
+    """Construit la table de faits d'une année à partir de ses tables nettoyées."""
+    partition = chemin_partition(dossier_sortie, annee)
+    tables = {nom: lire_table(os.path.join(partition, nom)) for nom in ETAPES_TABLES}
+    usagers = tables.pop("usagers")
+    faits = construire_faits(usagers, tables)
+    exporter_table(faits, os.path.join(partition, TABLE_FAITS), FORMATS_ETAPES[TABLE_FAITS])
+
+    # Profil de la vue usager servie à l'application (page Dataset)
+    vue = vers_pandas(joindre_partition(partition))
+    ecrire_profil(profiler_table(vue, TABLE_FAITS, annee), partition, TABLE_FAITS)
+    return annee, TABLE_FAITS
+
+
+def construire_annees(annees, dossier_brut=DOSSIER_BRUT, dossier_sortie=DOSSIER_SORTIE,
+                      forcer=False, taille_bloc=None, workers=None):
+    """
+    Reconstruit les partitions des années demandées sur un pool de
+    processus : chaque couple année x table périmé est une tâche, et les
+    faits d'une année sont lancés dès que ses quatre tables sont prêtes.
+
+    Seules les étapes dont le fichier brut, le code ou une dépendance a
+    changé depuis la dernière exécution sont recalculées. Les manifestes
+    ne sont écrits que par le processus principal.
+    Renvoie {annee: [étapes recalculées]}.
+    """
+    manifestes = {}
+    cles = {}
+    restantes = {}
+    recalculees = {annee: [] for annee in annees}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        taches = set()
+
+        def lancer_faits(annee):
+            chemin = os.path.join(chemin_partition(dossier_sortie, annee), TABLE_FAITS)
+            if not etape_a_jour(manifestes[annee], TABLE_FAITS, cles[annee][TABLE_FAITS], chemin):
+                taches.add(pool.submit(executer_faits, annee, dossier_sortie))
+
+        for annee in annees:
+            partition = chemin_partition(dossier_sortie, annee)
+            manifestes[annee] = {} if forcer else lire_manifeste(partition)
+            cles[annee] = cles_annee(annee, dossier_brut)
+            restantes[annee] = {
+                nom for nom in ETAPES_TABLES
+                if not etape_a_jour(manifestes[annee], nom, cles[annee][nom], os.path.join(partition, nom))
+            }
+            for nom in restantes[annee]:
+                taches.add(pool.submit(executer_etape, nom, annee, dossier_brut, dossier_sortie, taille_bloc))
+            if not restantes[annee]:
+                lancer_faits(annee)
+
+        while taches:
+            terminees, taches = wait(taches, return_when=FIRST_COMPLETED)
+            for tache in terminees:
+                annee, nom = tache.result()
+                manifestes[annee][nom] = cles[annee][nom]
+                ecrire_manifeste(chemin_partition(dossier_sortie, annee), manifestes[annee])
+                recalculees[annee].append(nom)
+                restantes[annee].discard(nom)
+                if nom != TABLE_FAITS and not restantes[annee]:
+                    lancer_faits(annee)
+
+    return recalculees
+
+
+# =====================================================================
+# EXÉCUTION MULTI-ANNÉES
+# =====================================================================
+def lire_annees(valeurs):
+    """Accepte "2023", "2019-2023" ou une liste de ces formes."""
+    annees = []
+    for valeur in valeurs:
+        if "-" in valeur:
+            debut, fin = valeur.split("-")
+            annees.extend(range(int(debut), int(fin) + 1))
+        else:
+            annees.append(int(valeur))
+    return sorted(set(annees))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nettoyage des fichiers BAAC par année")
+    parser.add_argument("annees", nargs="*", default=[str(a) for a in ANNEES], help="ex. 2023 ou 2005-2024")
+    parser.add_argument("--brut", default=DOSSIER_BRUT, help="dossier des CSV bruts")
+    parser.add_argument("--sortie", default=DOSSIER_SORTIE, help="dossier du dataset partitionné")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (par défaut : un par cœur)")
+    parser.add_argument("--forcer", action="store_true", help="ignorer le cache et tout recalculer")
+    parser.add_argument("--blocs", type=int, default=None, help="taille de bloc (lignes) pour nettoyer usagers/véhicules en streaming")
+    args = parser.parse_args()
+
+    annees = lire_annees(args.annees)
+
+    # Chaque couple année x table est une tâche du pool de processus
+    recalculees = construire_annees(annees, args.brut, args.sortie, args.forcer, args.blocs, args.workers)
+    for annee in annees:
+        if recalculees[annee]:
+            print(f"Année {annee} : étapes recalculées {', '.join(recalculees[annee])}")
+        else:
+            print(f"Année {annee} : à jour, rien à recalculer")
+
+
+if __name__ == "__main__":
+    main()
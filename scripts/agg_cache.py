@@ -0,0 +1,81 @@
+# ======================================================
+# SHARED AGGREGATION CACHE
+# ======================================================
+# Process-wide cache of chart aggregations and their figures, keyed on
+# (chart id, dataset, normalized filter state). One instance is shared
+# by every Streamlit session through st.cache_resource; entries are
+# evicted least recently used first once the entry count or the
+# estimated size is exceeded.
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def _estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figure: size of the payload sent to the browser
+        return len(value.to_json())
+    return sys.getsizeof(value)
+
+
+class AggregationCache:
+    """Thread-safe LRU cache with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Computed outside the lock: concurrent misses on the same key only duplicate work
+        value = compute()
+        size = _estimate_bytes(value)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
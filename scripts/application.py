@@ -3,37 +3,36 @@
 # ======================================================
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
 
-# -----------------------------------------------------
-# BRANDING — Inspired by Les Echos
-# -----------------------------------------------------
-BRAND_PRIMARY = "#B21807"
-BRAND_SECONDARY = "#63150C"
-BRAND_ACCENT = "#D9B28C"
-BRAND_DARK = "#1F1F1F"
-BRAND_LIGHT = "#F7F3EE"
-BRAND_NEUTRAL = "#D9D4CE"
-BRAND_CHART_SEQUENCE = [
-    "#B21807",
-    "#D94F30",
-    "#E88A64",
-    "#5C5C5C",
-]
-BRAND_BAR_SEQUENCE = [
-    "#B21807",
-    "#C53020",
-    "#D94F30",
-    "#E47354",
-    "#EF9B79",
-    "#F3B892",
-    "#7E2B18",
-    "#A64E3D",
-    "#CC6E58",
-    "#F7D6C2",
-]
+from stockage_baac import annees_disponibles
+from etoile_baac import TABLE_FAITS, joindre_etoile, ouvrir_etoile, tranche_etoile
+from cache_baac import lire_manifeste
+from profil_baac import fusionner_profils, lire_profil, profiler_colonne, profiler_table, statistiques_descriptives
+from schema_baac import TYPES_LIBELLES, vers_pandas
+from agg_cache import AggregationCache
+from viz_cube import CHART_DATA, build_cube, cube_total
+from viz_figures import (
+    BRAND_ACCENT,
+    BRAND_BAR_SEQUENCE,
+    BRAND_CHART_SEQUENCE,
+    BRAND_DARK,
+    BRAND_LIGHT,
+    BRAND_NEUTRAL,
+    BRAND_PRIMARY,
+    BRAND_SECONDARY,
+    BRAND_TEMPLATE,
+    CHART_FIGURES,
+)
+from viz_filters import build_filter_index, filter_key, select_positions
+from viz_map import FRANCE_CENTER, coordinate_arrays, grid_bins, grid_steps, in_cells
+from spatial_index import build_spatial_index, query_bbox, query_radius
+from text_mining import WordCloud, render_wordcloud, text_digest, word_frequencies
+
+# Palette de marque et template Plotly : viz_figures.py
 NAV_FLOW = {
     "home": {"next": "dataset"},
     "dataset": {"prev": "home", "next": "viz"},
@@ -43,6 +42,34 @@ NAV_FLOW = {
 BAAC_SCHEMA_PATH = Path("assets/baac_schema.png")
 ARTICLE_WORDCLOUD_PATH = Path("assets/article_wordcloud.png")
 ARTICLE_PATH = Path("article.txt")
+DATASET_DIR = "clean/baac"
+# Colonnes réellement utilisées par la page de visualisations
+VIZ_COLUMNS = [
+    "sexe",
+    "grav_3_niveaux",
+    "zone_detaillee",
+    "age",
+    "tranche_age",
+    "periode",
+    "niveau_vitesse",
+]
+# Colonnes de la carte : filtres de la page + coordonnées
+MAP_COLUMNS = VIZ_COLUMNS + ["lat", "long", "coord_valide"]
+COLUMN_RENAMES = {
+    "long": "longitude",
+    "lon": "longitude",
+    "lng": "longitude",
+    "Long": "longitude",
+}
+TABLE_PAGE_SIZE = 50
+PREVIEW_PAGE_SIZE = 20
+MAP_CELL_SIZES_KM = [2, 5, 10, 20, 50]
+TOP_WORDS = 20
+# Year selections kept in memory by each loader below (the least recently
+# used one is dropped beyond that); load_data holds one frame per column set
+CACHED_SELECTIONS = 4
+# Store columns the app derives its own columns from (annee is always joined)
+APP_SOURCE_COLUMNS = ("sexe",)
 
 # -----------------------------------------------------
 # CONFIG
@@ -51,28 +78,157 @@ st.set_page_config(page_title="Observatoire des accidents de la route", layout="
 
 
 # -----------------------------------------------------
-# LOAD DATA (FINAL_2023)
+# LOAD DATA (PARTITIONS ANNUELLES)
 # -----------------------------------------------------
-@st.cache_data
-def load_data():
-    df = pd.read_csv("clean/final_2023.csv")
+@st.cache_resource(max_entries=CACHED_SELECTIONS)
+def load_store(years, versions):
+    """
+    Fact and dimension tables of the selected partitions, memory-mapped once
+    and shared read-only by every session. Nothing is read until joined.
+
+    Every loader is keyed on `versions` (dataset_versions) as well as the
+    years: a rebuilt partition gets new cache entries and is read again.
+    """
+    return ouvrir_etoile(DATASET_DIR, years)
+
+
+@st.cache_resource(max_entries=3 * CACHED_SELECTIONS)
+def load_data(years, versions, columns=None):
+    """
+    Pandas view of the store, converted once per (years, versions, columns) and shared
+    by every session: pages must treat it as read-only. Only `columns` are
+    joined from the store.
+    """
+    return app_frame(joindre_etoile(load_store(years, versions), None if columns is None else tuple(columns)))
+
+
+def app_frame(table):
+    """Pandas frame of a joined view of the store, with the app's column names and derived columns."""
+    # Codes en entiers compacts, libellés en category ordonnée
+    df = vers_pandas(table, split_blocks=True)
 
     # Fix longitude naming
-    df = df.rename(columns={
-        "long": "longitude",
-        "lon": "longitude",
-        "lng": "longitude",
-        "Long": "longitude"
-    })
+    df = df.rename(columns=COLUMN_RENAMES)
 
     # Fix sexe label
-    df["sexe"] = pd.to_numeric(df["sexe"], errors="coerce").astype("Int64")
-    df["sexe_label"] = df["sexe"].map({1: "Homme", 2: "Femme"})
+    if "sexe" in df.columns:
+        df["sexe_label"] = df["sexe"].map({1: "Homme", 2: "Femme"}).astype(TYPES_LIBELLES["sexe_label"])
 
     return df
 
 
-df = load_data()
+def preview_rows(years, versions, start, stop):
+    """Rows [start, stop) of the dataset view: only these fact rows are joined and converted."""
+    return app_frame(joindre_etoile(tranche_etoile(load_store(years, versions), start, stop)))
+
+
+def select_years():
+    """Sidebar year picker: only the selected partitions are read from disk."""
+    available = annees_disponibles(DATASET_DIR)
+    if not available:
+        st.error(f"Aucune partition annuelle trouvée dans {DATASET_DIR}. Lancez d'abord Nettoyage_BAAC.py.")
+        st.stop()
+    selected = st.sidebar.multiselect(
+        "Années",
+        options=available,
+        default=available[-1:],
+        key="years",
+    )
+    return tuple(sorted(selected or available[-1:]))
+
+
+@st.cache_resource(max_entries=CACHED_SELECTIONS)
+def load_viz_cube(years, versions):
+    """Count cube behind the viz page, built once per year selection on every row (no sampling)."""
+    return build_cube(load_data(years, versions, VIZ_COLUMNS))
+
+
+@st.cache_resource(max_entries=CACHED_SELECTIONS)
+def load_viz_filter_index(years, versions):
+    """Filter options and masks over the cube cells, shared by all sessions (memo included)."""
+    return build_filter_index(load_viz_cube(years, versions))
+
+
+@st.cache_resource(max_entries=CACHED_SELECTIONS)
+def load_map_index(years, versions):
+    """Row-level filter index, coordinate arrays and spatial index used by the accident map."""
+    rows = load_data(years, versions, MAP_COLUMNS)
+    lat, lon = coordinate_arrays(rows)
+    return build_filter_index(rows), lat, lon, build_spatial_index(lat, lon)
+
+
+def dataset_versions(years):
+    """Cache key of each selected partition's fact table, as recorded in its manifest."""
+    return tuple(lire_manifeste(Path(DATASET_DIR) / f"annee={year}").get(TABLE_FAITS) for year in years)
+
+
+@st.cache_resource(max_entries=CACHED_SELECTIONS)
+def load_dataset_profile(years, versions):
+    """
+    Column profile and summary statistics of the dataset page, merged from
+    the per-year profiles written by the pipeline: adding or rebuilding a
+    year only changes `versions`, and only that year's profile is new.
+    Computed from the rows only if a profile file is missing.
+    """
+    profiles = [lire_profil(Path(DATASET_DIR) / f"annee={year}", TABLE_FAITS) for year in years]
+    if any(profile is None for profile in profiles):
+        return profiler_table(load_data(years, versions))
+
+    profile = fusionner_profils(profiles)
+    # Align with the app's column names (long -> longitude) and add app-side
+    # columns, profiled from the only store columns they are derived from
+    for entry in profile["colonnes"]:
+        entry["colonne"] = COLUMN_RENAMES.get(entry["colonne"], entry["colonne"])
+    known = {entry["colonne"] for entry in profile["colonnes"]}
+    df = load_data(years, versions, APP_SOURCE_COLUMNS)
+    for col in df.columns:
+        if col not in known:
+            entry, _, _ = profiler_colonne(df[col], {})
+            entry["taux_manquants"] = entry["manquants"] / len(df) if len(df) else 0.0
+            profile["colonnes"].append(entry)
+    return profile
+
+
+@st.cache_resource
+def get_aggregation_cache():
+    """Chart aggregations shared by every session of this server process."""
+    return AggregationCache()
+
+
+def chart_data(chart_id, years, versions, state, cells):
+    """Aggregated frame of a viz chart, served from the shared cache when possible (read-only)."""
+    key = (chart_id, years, versions, filter_key(state))
+    return get_aggregation_cache().get_or_compute(key, lambda: CHART_DATA[chart_id](cells))
+
+
+def chart_figure(chart_id, years, versions, state, cells):
+    """Figure of a viz chart, built from its aggregated data and cached with it (read-only)."""
+    key = ("figure", chart_id, years, versions, filter_key(state))
+    return get_aggregation_cache().get_or_compute(
+        key, lambda: CHART_FIGURES[chart_id](chart_data(chart_id, years, versions, state, cells))
+    )
+
+
+def render_chart(chart_id, years, versions, state, cells):
+    st.plotly_chart(chart_figure(chart_id, years, versions, state, cells), use_container_width=True)
+
+
+def render_cache_metrics():
+    stats = get_aggregation_cache().stats()
+    with st.sidebar.expander("Cache des agrégats"):
+        st.caption(
+            f"{stats['entries']} entrées · {stats['bytes'] / 1024:.0f} Ko · "
+            f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}) · "
+            f"{stats['evictions']} évictions"
+        )
+
+
+def years_label(years):
+    if len(years) == 1:
+        return str(years[0])
+    if list(years) == list(range(years[0], years[-1] + 1)):
+        return f"{years[0]}–{years[-1]}"
+    return ", ".join(str(year) for year in years)
 
 
 def inject_branding():
@@ -275,11 +431,11 @@ def inject_branding():
     st.markdown(css, unsafe_allow_html=True)
 
 
-def render_table(dataframe, *, index=False, scroll=False, height=320):
+def table_html(dataframe, *, index=False, scroll=False, height=320):
     df_display = dataframe.copy()
     if not index:
         df_display = df_display.reset_index(drop=True)
-    df_display = df_display.fillna("")
+    df_display = df_display.astype(object).fillna("")
     html = df_display.to_html(index=index, classes="le-table", border=0, escape=False)
     wrapper_classes = ["le-table-wrapper"]
     style_attr = ""
@@ -288,24 +444,56 @@ def render_table(dataframe, *, index=False, scroll=False, height=320):
         if height:
             style_attr = f"style='max-height:{height}px'"
     class_attr = " ".join(wrapper_classes)
-    st.markdown(f"<div class='{class_attr}' {style_attr}>{html}</div>", unsafe_allow_html=True)
+    return f"<div class='{class_attr}' {style_attr}>{html}</div>"
 
 
-def style_plot(fig):
-    fig.update_layout(
-        template="simple_white",
-        title_text="",
-        legend_title_text="",
-        font=dict(family="Georgia, 'Times New Roman', serif", color=BRAND_DARK, size=14),
-        title_font=dict(size=24, family="Playfair Display, Georgia, serif", color=BRAND_DARK),
-        plot_bgcolor="#FFFFFF",
-        paper_bgcolor="#FFFFFF",
-        bargap=0.2,
-        margin=dict(t=60, b=40, l=40, r=30),
+def render_table(dataframe, *, index=False, scroll=False, height=320, page_size=TABLE_PAGE_SIZE, key=None):
+    """
+    Branded le-table rendering of a frame, one page of rows at a time.
+
+    Only the visible window is converted to HTML and sent to the browser,
+    so the cost does not depend on the size of the frame.
+    """
+    render_table_pages(
+        lambda start, stop: dataframe.iloc[start:stop],
+        len(dataframe),
+        index=index,
+        scroll=scroll,
+        height=height,
+        page_size=page_size,
+        key=key,
     )
-    fig.update_xaxes(showgrid=False, linecolor=BRAND_NEUTRAL)
-    fig.update_yaxes(showgrid=True, gridcolor="#EFE8E1", zerolinecolor="#EFE8E1")
-    fig.update_layout(coloraxis_colorbar=dict(title=""))
+
+
+def render_table_pages(fetch_rows, total_rows, *, index=False, scroll=False, height=320, page_size=TABLE_PAGE_SIZE, key=None):
+    """
+    Paginated le-table over any row source: `fetch_rows(start, stop)` is
+    only called for the page being displayed.
+    """
+    page_count = max(1, -(-total_rows // page_size))
+    page = 1
+    if page_count > 1:
+        col_page, col_info = st.columns([1, 3])
+        page = col_page.number_input(
+            "Page",
+            min_value=1,
+            max_value=page_count,
+            value=1,
+            step=1,
+            key=f"{key or 'table'}_page",
+        )
+        start = (page - 1) * page_size
+        col_info.caption(
+            f"Lignes {start + 1:,} à {min(start + page_size, total_rows):,} sur {total_rows:,}".replace(",", " ")
+        )
+    start = (page - 1) * page_size
+    window = fetch_rows(start, min(start + page_size, total_rows))
+    st.markdown(table_html(window, index=index, scroll=scroll, height=height), unsafe_allow_html=True)
+
+
+def style_plot(fig):
+    """Branded look for the remaining plotly express figures (same template object as viz_figures)."""
+    fig.update_layout(template=BRAND_TEMPLATE, title_text="", legend_title_text="")
     return fig
 
 
@@ -357,7 +545,7 @@ def render_baac_overview():
                     </ul>
                 </div>
             </div>
-            <p style="margin-top:1rem;">Ces rubriques sont transformées en variables dans le fichier <code>final_2023.csv</code>, ce qui permet d’expliquer chaque indicateur affiché sur les pages suivantes.</p>
+            <p style="margin-top:1rem;">Ces rubriques sont transformées en variables et stockées en modèle en étoile : une table d’usagers reliée aux accidents, lieux et véhicules (une partition par année), ce qui permet d’expliquer chaque indicateur affiché sur les pages suivantes.</p>
         </div>
         """,
         unsafe_allow_html=True,
@@ -415,78 +603,67 @@ def render_preparation_overview():
     )
 
 
-def apply_viz_filters(dataframe):
-    """Render dynamic filters and return the filtered dataframe used in the viz page."""
+def apply_viz_filters(cube, filter_index):
+    """Render dynamic filters and return (filter state, matching cube cells) for the viz page."""
     st.markdown("### Filtres dynamiques")
     st.caption("Affinez les visualisations en sélectionnant les profils d'usagers à comparer.")
 
-    filtered = dataframe.copy()
-    base = dataframe.copy()
+    options = filter_index["options"]
+    state = {}
     col1, col2, col3 = st.columns(3)
 
-    sexe_options = sorted(base["sexe_label"].dropna().unique().tolist())
-    selected_sexes = col1.multiselect(
+    sexe_options = sorted(options["sexes"])
+    state["sexes"] = col1.multiselect(
         "Sexe de l'usager",
         options=sexe_options,
         default=sexe_options,
         placeholder="Tous les sexes",
     )
-    if selected_sexes:
-        filtered = filtered[filtered["sexe_label"].isin(selected_sexes)]
 
-    grav_order = ["Indemne", "Blessé léger", "Blessé hospitalisé", "Tué"]
-    grav_options = [label for label in grav_order if label in base["grav_3_niveaux"].dropna().unique().tolist()]
-    selected_grav = col2.multiselect(
+    # Options déjà dans l'ordre de la category grav_3_niveaux
+    grav_options = options["gravities"]
+    state["gravities"] = col2.multiselect(
         "Gravité déclarée",
         options=grav_options,
         default=grav_options,
         placeholder="Toutes les gravités",
     )
-    if selected_grav:
-        filtered = filtered[filtered["grav_3_niveaux"].isin(selected_grav)]
 
-    zone_options = sorted(base["zone_detaillee"].dropna().unique().tolist())
-    selected_zones = col3.multiselect(
+    zone_options = sorted(options["zones"])
+    state["zones"] = col3.multiselect(
         "Zone de circulation",
         options=zone_options,
         default=zone_options,
         placeholder="Toutes les zones",
     )
-    if selected_zones:
-        filtered = filtered[filtered["zone_detaillee"].isin(selected_zones)]
-
-    age_series = base["age"].dropna()
-    if not age_series.empty:
-        min_age = int(age_series.min())
-        max_age = int(age_series.max())
-        age_min, age_max = st.slider(
+
+    state["age_range"] = None
+    if filter_index["age_bounds"] is not None:
+        min_age, max_age = filter_index["age_bounds"]
+        state["age_range"] = st.slider(
             "Âge des usagers",
             min_value=min_age,
             max_value=max_age,
             value=(min_age, max_age),
             step=1,
         )
-        filtered = filtered[filtered["age"].between(age_min, age_max)]
 
     col_flag1, col_flag2 = st.columns(2)
-    night_only = col_flag1.checkbox("Limiter aux accidents de nuit", value=False)
-    if night_only:
-        filtered = filtered[filtered["periode"] == "Nuit"]
-
-    severe_only = col_flag2.checkbox(
+    state["night_only"] = col_flag1.checkbox("Limiter aux accidents de nuit", value=False)
+    state["severe_only"] = col_flag2.checkbox(
         "Focaliser sur les accidents graves",
         value=False,
         help="Tués ou blessés hospitalisés",
     )
-    if severe_only:
-        filtered = filtered[filtered["grav_3_niveaux"].isin(["Tué", "Blessé hospitalisé"])]
 
+    positions = select_positions(filter_index, state)
+    filtered = cube.take(positions)
     st.caption(
-        f"{len(filtered):,}".replace(",", " ")
-        + f" usagers sélectionnés sur {len(dataframe):,}".replace(",", " ")
+        f"{cube_total(filtered):,}".replace(",", " ")
+        + f" usagers sélectionnés sur {cube_total(cube):,}".replace(",", " ")
     )
 
-    return filtered
+    return state, filtered
 
 
 inject_branding()
@@ -495,32 +672,36 @@ inject_branding()
 # -----------------------------------------------------
 # PAGE : Dataset
 # -----------------------------------------------------
-def page_dataset(df):
+def page_dataset(years, versions, profile):
 
     st.title("Présentation du Dataset")
 
+    # Counts come from the profile: the multi-year frame is never built here
+    columns = [entry["colonne"] for entry in profile["colonnes"]]
     col1, col2, col3 = st.columns(3)
-    col1.metric("Nombre d'accidents", len(df))
-    col2.metric("Année", "2023")
-    col3.metric("Variables", df.shape[1])
+    col1.metric("Nombre d'accidents", profile["lignes"])
+    col2.metric("Années" if len(years) > 1 else "Année", years_label(years))
+    col3.metric("Variables", len(columns))
 
     render_baac_overview()
     render_preparation_overview()
 
     st.subheader("Types des variables")
+    # Types and missing rates come from the precomputed column profile
+    columns_df = pd.DataFrame(profile["colonnes"]).set_index("colonne").reindex(columns).rename_axis("colonne")
     types_df = (
-        df.dtypes.astype(str)
+        columns_df["type"]
         .reset_index()
-        .rename(columns={"index": "Variable", 0: "Type"})
+        .rename(columns={"colonne": "Variable", "type": "Type"})
     )
-    render_table(types_df, index=False, scroll=True, height=280)
+    render_table(types_df, index=False, scroll=True, height=280, key="types")
 
     st.subheader("Valeurs manquantes (%)")
     missing_df = (
-        (df.isna().mean() * 100)
+        (columns_df["taux_manquants"] * 100)
         .round(2)
         .reset_index()
-        .rename(columns={"index": "Variable", 0: "Valeurs manquantes (%)"})
+        .rename(columns={"colonne": "Variable", "taux_manquants": "Valeurs manquantes (%)"})
     )
     fig_missing = px.bar(
         missing_df,
@@ -534,38 +715,46 @@ def page_dataset(df):
     st.plotly_chart(fig_missing, use_container_width=True)
 
     st.subheader("Aperçu du dataset")
-    render_table(df.head(), index=False, scroll=True, height=260)
+    render_table_pages(
+        lambda start, stop: preview_rows(years, versions, start, stop),
+        profile["lignes"],
+        scroll=True,
+        height=260,
+        page_size=PREVIEW_PAGE_SIZE,
+        key="preview",
+    )
 
     st.subheader("Statistiques descriptives")
-    stats_df = (
-        df.describe(include="all")
-        .transpose()
-        .reset_index()
-        .rename(columns={"index": "Variable"})
-    )
-    render_table(stats_df, index=False, scroll=True, height=320)
+    stats_df = statistiques_descriptives(profile).set_index("Variable").reindex(columns).reset_index()
+    render_table(stats_df, index=False, scroll=True, height=320, key="stats")
 
 
 # -----------------------------------------------------
 # PAGE : Visualisations
 # -----------------------------------------------------
-def page_viz(df):
+def page_viz(cube, filter_index, years, versions):
 
-    st.title("Visualisations interactives (2023)")
+    st.title(f"Visualisations interactives ({years_label(years)})")
     st.caption("Ces graphiques décrivent l'ensemble des usagers impliqués dans un accident corporel (conducteurs, passagers, piétons), qu'ils soient responsables ou victimes.")
 
     # ------------------------------
-    # ÉCHANTILLONNAGE AUTOMATIQUE
+    # FILTRES (comptages exacts sur toutes les lignes via le cube)
     # ------------------------------
-    dff = df.copy()
-    if len(dff) > 30000:
-        dff = dff.sample(30000, random_state=42)
-
-    dff = apply_viz_filters(dff)
-    if dff.empty:
+    state, dff = apply_viz_filters(cube, filter_index)
+    if cube_total(dff) == 0:
         st.warning("Aucun enregistrement ne correspond à ces critères. Ajustez les filtres pour poursuivre l'analyse.")
         return
 
+    # Une section par onglet : seul l'onglet ouvert est calculé (voir VIZ_SECTIONS)
+    tabs = st.tabs(list(VIZ_SECTIONS), key="viz_section", on_change="rerun")
+    for tab, render_section in zip(tabs, VIZ_SECTIONS.values()):
+        if tab.open:
+            with tab:
+                render_section(years, versions, state, dff)
+
+
+@st.fragment
+def render_profiles_section(years, versions, state, dff):
     st.markdown(
         "### Introduction\nLa majorité des usagers impliqués ressortent indemnes ou avec des blessures légères, "
         "et l'on constate que les hommes apparaissent près de deux fois plus souvent que les femmes dans les accidents."
@@ -573,231 +762,197 @@ def page_viz(df):
     col_grav, col_sexe = st.columns(2)
     with col_grav:
         st.subheader("Gravité des accidents")
-        grav_data = dff.dropna(subset=["grav_3_niveaux"])
-        fig_grav = px.pie(
-            grav_data,
-            names="grav_3_niveaux",
-            color_discrete_sequence=BRAND_CHART_SEQUENCE,
-        )
-        fig_grav = style_plot(fig_grav)
-        fig_grav.update_traces(textposition="inside", hole=0.15)
-        st.plotly_chart(fig_grav, use_container_width=True)
+        render_chart("gravity", years, versions, state, dff)
 
     with col_sexe:
         st.subheader("Implication par sexe")
-        involvement = (
-            dff.dropna(subset=["sexe_label"])
-            .groupby("sexe_label")
-            .size()
-            .reset_index(name="accidents")
-        )
-        fig_invol = px.pie(
-            involvement,
-            names="sexe_label",
-            values="accidents",
-            color="sexe_label",
-            color_discrete_sequence=BRAND_CHART_SEQUENCE[:2],
-        )
-        fig_invol = style_plot(fig_invol)
-        fig_invol.update_traces(textposition="inside", hole=0.2)
-        st.plotly_chart(fig_invol, use_container_width=True)
+        render_chart("sex", years, versions, state, dff)
 
     st.markdown(
         "### Gravité selon le sexe\nMême si les hommes sont plus nombreux au volant, la répartition des niveaux de gravité "
         "reste proche de celle des femmes : les deux genres subissent proportionnellement autant d'accidents graves quand ils sont impliqués."
     )
-    sexe_counts = (
-        dff.dropna(subset=["sexe_label", "grav_3_niveaux"])
-        .groupby(["sexe_label", "grav_3_niveaux"])
-        .size()
-        .reset_index(name="accidents")
-    )
-    sexe_share = sexe_counts.assign(
-        part=lambda x: x["accidents"] / x.groupby("sexe_label")["accidents"].transform("sum")
-    )
-    fig_sexe = px.bar(
-        sexe_share,
-        x="sexe_label",
-        y="part",
-        color="grav_3_niveaux",
-        barmode="group",
-        color_discrete_sequence=BRAND_CHART_SEQUENCE,
-    )
-    fig_sexe = style_plot(fig_sexe)
-    fig_sexe.update_layout(
-        xaxis_title="Sexe",
-        yaxis_title="Part des accidents",
-        legend_title_text="Gravité",
-    )
-    fig_sexe.update_yaxes(tickformat=".0%")
-    st.plotly_chart(fig_sexe, use_container_width=True)
+    render_chart("sex_gravity", years, versions, state, dff)
+
 
+@st.fragment
+def render_ages_section(years, versions, state, dff):
     st.markdown(
         "### Dynamiques d'âge\nLes accidents impliquent surtout les 25–59 ans, mais lorsqu'on observe la part d'accidents nocturnes, "
         "les mineurs se démarquent largement : la conduite nocturne représente un risque particulier pour les plus jeunes."
     )
-    age_order = ["Mineur", "18–24", "25–39", "40–59", "60+"]
     col_age, col_night = st.columns(2)
     with col_age:
         st.subheader("Répartition par tranche d'âge")
-        age_data = (
-            dff.dropna(subset=["tranche_age", "grav_3_niveaux"])
-            .assign(tranche_age=lambda x: pd.Categorical(x["tranche_age"], categories=age_order, ordered=True))
-        )
-        age_counts = (
-            age_data.groupby(["tranche_age", "grav_3_niveaux"], observed=False)
-            .size()
-            .reset_index(name="accidents")
-            .sort_values("tranche_age")
-        )
-        fig_age = px.bar(
-            age_counts,
-            x="tranche_age",
-            y="accidents",
-            color="grav_3_niveaux",
-            barmode="stack",
-            color_discrete_sequence=BRAND_CHART_SEQUENCE,
-        )
-        fig_age = style_plot(fig_age)
-        fig_age.update_layout(
-            xaxis_title="Tranches d'âge",
-            yaxis_title="Nombre d'accidents",
-            legend_title_text="Gravité",
-        )
-        st.plotly_chart(fig_age, use_container_width=True)
+        render_chart("age_gravity", years, versions, state, dff)
 
     with col_night:
         st.subheader("Part de la nuit par tranche d'âge")
-        night_data = (
-            dff.dropna(subset=["periode", "tranche_age"])
-            .assign(tranche_age=lambda x: pd.Categorical(x["tranche_age"], categories=age_order, ordered=True))
-        )
-        # Ensure every paire (tranche_age, période) exists so percentages remain correct even after filtering.
-        nuit_index = pd.MultiIndex.from_product(
-            [age_order, ["Matin", "Après-midi", "Soir", "Nuit"]],
-            names=["tranche_age", "periode"],
-        )
-        night_counts = (
-            night_data.groupby(["tranche_age", "periode"], observed=False)
-            .size()
-            .reindex(nuit_index, fill_value=0)
-            .reset_index(name="accidents")
-        )
-        total_by_age = night_counts.groupby("tranche_age")["accidents"].sum().reset_index(name="total")
-        night_share = (
-            night_counts.merge(total_by_age, on="tranche_age")
-            .assign(part=lambda x: x["accidents"] / x["total"])
-            .pipe(lambda df: df[df["periode"] == "Nuit"])
-            .sort_values("part", ascending=False)
-        )
-        fig_night = px.bar(
-            night_share,
-            x="tranche_age",
-            y="part",
-            color="tranche_age",
-            color_discrete_sequence=BRAND_BAR_SEQUENCE,
-        )
-        fig_night = style_plot(fig_night)
-        fig_night.update_layout(
-            xaxis_title="Tranches d'âge",
-            yaxis_title="Part des accidents sur la période Nuit",
-            showlegend=False,
-        )
-        fig_night.update_yaxes(tickformat=".0%")
-        st.plotly_chart(fig_night, use_container_width=True)
+        render_chart("night_by_age", years, versions, state, dff)
 
     st.subheader("Accidents par période et zone de circulation")
-    periode_data = (
-        dff.dropna(subset=["periode", "zone_detaillee"])
-        .assign(periode=lambda x: pd.Categorical(x["periode"], categories=["Matin", "Après-midi", "Soir", "Nuit"], ordered=True))
-    )
-    zone_categories = sorted(periode_data["zone_detaillee"].unique().tolist())
-    periode_index = pd.MultiIndex.from_product(
-        [["Matin", "Après-midi", "Soir", "Nuit"], zone_categories or ["Zone inconnue"]],
-        names=["periode", "zone_detaillee"],
-    )
-    periode_counts = (
-        periode_data.groupby(["periode", "zone_detaillee"], observed=False)
-        .size()
-        .reindex(periode_index, fill_value=0)
-        .reset_index(name="accidents")
-        .sort_values("periode")
-    )
-    if not zone_categories:
-        periode_counts = periode_counts[periode_counts["zone_detaillee"] == "Zone inconnue"]
-    fig_periode = px.bar(
-        periode_counts,
-        x="periode",
-        y="accidents",
-        color="zone_detaillee",
-        color_discrete_sequence=BRAND_BAR_SEQUENCE,
-    )
-    fig_periode = style_plot(fig_periode)
-    fig_periode.update_layout(
-        xaxis_title="Période",
-        yaxis_title="Nombre d'accidents",
-        legend_title_text="Zone détaillée",
-    )
-    st.plotly_chart(fig_periode, use_container_width=True)
+    render_chart("period_zone", years, versions, state, dff)
 
+
+@st.fragment
+def render_environment_section(years, versions, state, dff):
     st.markdown(
         "### Gravité par environnement\nLes espaces ruraux ou périurbains concentrent une part plus élevée d'accidents graves. "
         "Le treemap permet d'identifier les environnements où la mortalité ou les blessures lourdes sont proportionnellement les plus présentes."
     )
-    zone_data = dff.dropna(subset=["zone_detaillee", "grav_3_niveaux"])
-    zone_summary = (
-        zone_data.assign(grave=lambda x: x["grav_3_niveaux"].isin(["Tué", "Blessé hospitalisé"]).astype(int))
-        .groupby("zone_detaillee", observed=False)
-        .agg(total=("grav_3_niveaux", "size"), graves=("grave", "sum"))
-        .reset_index()
-        .assign(part_graves=lambda x: x["graves"] / x["total"])
-    )
-    fig_zone = px.treemap(
-        zone_summary,
-        path=["zone_detaillee"],
-        values="total",
-        color="part_graves",
-        color_continuous_scale=[BRAND_LIGHT, BRAND_PRIMARY],
-        color_continuous_midpoint=zone_summary["part_graves"].mean(),
-    )
-    fig_zone.update_layout(
-        margin=dict(t=50, l=0, r=0, b=0),
-        coloraxis_colorbar=dict(title="Part d'accidents graves", tickformat=".0%"),
-    )
-    st.plotly_chart(fig_zone, use_container_width=True)
+    render_chart("zone_severity", years, versions, state, dff)
 
     st.markdown(
         "### Gravité et vitesse\nPlus la limitation est élevée, plus la part d'accidents graves augmente — un rappel direct "
         "que les initiatives plaidant pour moins de signalisation ou un code de la route « plus léger » risquent d'amplifier les conséquences physiques."
     )
-    speed_data = (
-        dff.dropna(subset=["niveau_vitesse", "grav_3_niveaux"])
-        .assign(grave=lambda x: x["grav_3_niveaux"].isin(["Tué", "Blessé hospitalisé"]).astype(int))
+    render_chart("speed_severity", years, versions, state, dff)
+
+
+@st.fragment
+def render_map_section(years, versions, state, dff):
+    render_accident_map(years, versions, state)
+
+
+# Onglets de la page, dans l'ordre d'affichage. Chaque section est un
+# fragment : ses propres widgets (taille des cellules, sélection sur la
+# carte, recherche par rayon) ne relancent qu'elle, et un changement de
+# filtre ne recalcule que l'onglet ouvert.
+VIZ_SECTIONS = {
+    "Profils des usagers": render_profiles_section,
+    "Âges et périodes": render_ages_section,
+    "Environnement et vitesse": render_environment_section,
+    "Carte": render_map_section,
+}
+
+
+def render_accident_map(years, versions, state):
+    st.markdown(
+        "### Carte des accidents\nLes usagers sélectionnés par les filtres sont regroupés en cellules côté serveur : "
+        "seuls les centres des cellules et leurs effectifs sont envoyés au navigateur."
     )
-    speed_summary = (
-        speed_data.groupby("niveau_vitesse", observed=False)
-        .agg(total=("grav_3_niveaux", "size"), graves=("grave", "sum"))
-        .reset_index()
-        .assign(part_graves=lambda x: x["graves"] / x["total"])
+    cell_km = st.select_slider("Taille des cellules (km)", options=MAP_CELL_SIZES_KM, value=10)
+
+    row_index, lat, lon, spatial = load_map_index(years, versions)
+    positions = select_positions(row_index, state)
+    bins = get_aggregation_cache().get_or_compute(
+        ("map", years, versions, filter_key(state), cell_km),
+        lambda: grid_bins(lat, lon, positions, cell_km),
     )
-    vitesse_order = ["Faible", "Moyenne", "Élevée"]
-    speed_summary["niveau_vitesse"] = pd.Categorical(speed_summary["niveau_vitesse"], categories=vitesse_order, ordered=True)
-    speed_summary = speed_summary.sort_values("niveau_vitesse")
-    fig_speed = px.line(
-        speed_summary,
-        x="niveau_vitesse",
-        y="part_graves",
-        markers=True,
-        color_discrete_sequence=[BRAND_PRIMARY],
+    if bins.empty:
+        st.info("Aucune coordonnée exploitable pour cette sélection.")
+        return
+
+    fig_map = px.scatter_map(
+        bins,
+        lat="lat",
+        lon="lon",
+        size="accidents",
+        color="accidents",
+        color_continuous_scale=[BRAND_ACCENT, BRAND_PRIMARY],
+        size_max=18,
+        zoom=4.3,
+        center=FRANCE_CENTER,
+        map_style="carto-positron",
+        hover_data={"lat": False, "lon": False, "accidents": True},
+    )
+    fig_map.update_layout(
+        height=560,
+        margin=dict(t=10, l=0, r=0, b=0),
+        coloraxis_colorbar=dict(title="Usagers"),
+    )
+    event = st.plotly_chart(
+        fig_map,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode=("box", "lasso"),
+        key="accident_map",
+    )
+    st.caption(
+        f"{len(bins):,} cellules affichées pour ".replace(",", " ")
+        + f"{int(bins['accidents'].sum()):,} usagers géolocalisés.".replace(",", " ")
+        + " Sélectionnez une zone sur la carte (rectangle ou lasso) pour l'analyser."
+    )
+
+    area_positions, area_label = spatial_selection(spatial, event, cell_km)
+    if area_positions is not None:
+        render_area_summary(years, versions, np.intersect1d(positions, area_positions, assume_unique=True), area_label)
+
+
+def selected_cells(event):
+    """Centres (lat, lon) of the map cells selected with the mouse, as two arrays."""
+    points = (event or {}).get("selection", {}).get("points", [])
+    points = [point for point in points if "lat" in point and "lon" in point]
+    return (
+        np.array([point["lat"] for point in points], dtype=float),
+        np.array([point["lon"] for point in points], dtype=float),
+    )
+
+
+def selection_positions(spatial, event, cell_km):
+    """
+    Positions in the map cells selected with the mouse, or None without selection.
+
+    The index is queried on the bounding box of the selected cells. A box
+    selection covers every cell of that box; a lasso does not, so the
+    candidates are then kept only if their own cell is one of the selected.
+    """
+    cell_lat, cell_lon = selected_cells(event)
+    if cell_lat.size == 0:
+        return None
+    # Selected points are cell centres: widen by half a cell to cover the whole cells
+    step_lat, step_lon = grid_steps(cell_km)
+    positions = query_bbox(
+        spatial,
+        cell_lat.min() - step_lat / 2,
+        cell_lat.max() + step_lat / 2,
+        cell_lon.min() - step_lon / 2,
+        cell_lon.max() + step_lon / 2,
     )
-    fig_speed = style_plot(fig_speed)
-    fig_speed.update_layout(
-        xaxis_title="Niveau de vitesse autorisée",
-        yaxis_title="Part d'accidents graves",
-        showlegend=False,
+    if event["selection"].get("lasso"):
+        positions = positions[
+            in_cells(spatial["lat"][positions], spatial["lon"][positions], cell_lat, cell_lon, cell_km)
+        ]
+    return positions
+
+
+def spatial_selection(spatial, event, cell_km):
+    """Positions inside the drawn selection or the radius search, with a label describing the area."""
+    with st.expander("Recherche autour d'un point"):
+        col_lat, col_lon, col_radius = st.columns(3)
+        center_lat = col_lat.number_input("Latitude", value=48.8566, min_value=-90.0, max_value=90.0, format="%.4f")
+        center_lon = col_lon.number_input("Longitude", value=2.3522, min_value=-180.0, max_value=180.0, format="%.4f")
+        radius_km = col_radius.slider("Rayon (km)", min_value=1, max_value=100, value=5)
+        use_radius = st.checkbox("Analyser les accidents dans ce rayon", value=False)
+
+    if use_radius:
+        return (
+            query_radius(spatial, center_lat, center_lon, radius_km),
+            f"dans un rayon de {radius_km} km autour de ({center_lat:.4f}, {center_lon:.4f})",
+        )
+    positions = selection_positions(spatial, event, cell_km)
+    if positions is not None:
+        return positions, "dans la zone sélectionnée sur la carte"
+    return None, None
+
+
+def render_area_summary(years, versions, positions, area_label):
+    st.subheader("Zone analysée")
+    st.caption(f"{len(positions):,}".replace(",", " ") + f" usagers {area_label} (filtres appliqués).")
+    if len(positions) == 0:
+        return
+    gravities = load_data(years, versions, MAP_COLUMNS)["grav_3_niveaux"].take(positions)
+    area_counts = gravities.value_counts(sort=False).rename_axis("grav_3_niveaux").reset_index(name="accidents")
+    fig_area = px.bar(
+        area_counts,
+        x="grav_3_niveaux",
+        y="accidents",
+        color="grav_3_niveaux",
+        color_discrete_sequence=BRAND_CHART_SEQUENCE,
     )
-    fig_speed.update_yaxes(tickformat=".0%")
-    st.plotly_chart(fig_speed, use_container_width=True)
+    fig_area = style_plot(fig_area)
+    fig_area.update_layout(xaxis_title="Gravité", yaxis_title="Nombre d'usagers", showlegend=False)
+    st.plotly_chart(fig_area, use_container_width=True)
 
 
 # -----------------------------------------------------
@@ -863,21 +1018,54 @@ def render_home():
 def render_dataset():
     st.markdown("### Étape 1 · Dataset")
     st.write("Faites défiler librement, la flèche à droite reste accessible pour passer aux visualisations.")
-    page_dataset(df)
+    years = select_years()
+    versions = dataset_versions(years)
+    page_dataset(years, versions, load_dataset_profile(years, versions))
 
 
 def render_viz():
     st.markdown("### Étape 2 · Visualisations")
-    page_viz(df)
+    years = select_years()
+    versions = dataset_versions(years)
+    page_viz(load_viz_cube(years, versions), load_viz_filter_index(years, versions), years, versions)
+    render_cache_metrics()
+
+@st.cache_resource
+def article_frequencies(digest, _text):
+    """Word counts of the article, computed once per content hash (`digest`)."""
+    return word_frequencies(_text)
+
+
+@st.cache_resource
+def article_wordcloud(digest, _text, max_words):
+    """PNG of the article word cloud, rendered once per (content hash, rendering parameters)."""
+    frequencies = article_frequencies(digest, _text)
+    return render_wordcloud(frequencies, max_words=max_words) if frequencies else None
+
 
 def render_article():
     st.markdown("### Étape 3 · Article et analyse textuelle")
     st.write("Nuage de mots extrait de l'article de presse récent et accès direct au contenu.")
 
-    if ARTICLE_WORDCLOUD_PATH.exists():
+    text = ARTICLE_PATH.read_text(encoding="utf-8") if ARTICLE_PATH.exists() else None
+    if text is not None and WordCloud is not None:
+        max_words = st.slider("Nombre de mots affichés", min_value=20, max_value=200, value=100, step=10)
+        image = article_wordcloud(text_digest(text), text, max_words)
+        if image is not None:
+            st.image(image, caption="Nuage de mots — Sécurité routière 2023", use_container_width=True)
+    elif ARTICLE_WORDCLOUD_PATH.exists():
+        # Sans le paquet wordcloud : visuel pré-généré
         st.image(str(ARTICLE_WORDCLOUD_PATH), caption="Nuage de mots — Sécurité routière 2023", use_container_width=True)
     else:
-        st.warning("Aucun nuage de mots généré. Ajoutez assets/article_wordcloud.png pour l'afficher.")
+        st.warning("Aucun nuage de mots généré. Installez wordcloud ou ajoutez assets/article_wordcloud.png pour l'afficher.")
+
+    if text is not None:
+        with st.expander("Mots les plus fréquents"):
+            frequencies = article_frequencies(text_digest(text), text)
+            render_table(
+                pd.DataFrame(list(frequencies.items())[:TOP_WORDS], columns=["mot", "occurrences"]),
+                key="article_words",
+            )
 
     st.link_button(
         "Consulter l'article du Monde",
@@ -885,10 +1073,10 @@ def render_article():
         help="Ouvre l'article complet dans votre navigateur."
     )
 
-    if ARTICLE_PATH.exists():
+    if text is not None:
         st.download_button(
             "Télécharger l'article (texte)",
-            ARTICLE_PATH.read_text(),
+            text,
             file_name="article_securite_routiere_2023.txt",
             mime="text/plain"
         )
@@ -0,0 +1,71 @@
+# =====================================================================
+# CACHE DE CONSTRUCTION (EMPREINTES DE CONTENU)
+# =====================================================================
+# Chaque étape du nettoyage est identifiée par une clé calculée à partir
+# du contenu des fichiers bruts, de la version du code de nettoyage et
+# des clés des étapes dont elle dépend. Les clés sont enregistrées dans
+# un manifeste par partition : une étape dont la clé n'a pas changé est
+# relue au lieu d'être recalculée.
+import hashlib
+import json
+from pathlib import Path
+
+from stockage_baac import trouver_table
+
+NOM_MANIFESTE = "_manifeste.json"
+TAILLE_BLOC = 1 << 20
+
+
+def empreinte_fichier(chemin):
+    """SHA-256 du contenu d'un fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def empreinte_code(chemins):
+    """Version du code de nettoyage : empreinte des fichiers sources donnés."""
+    h = hashlib.sha256()
+    for chemin in sorted(str(c) for c in chemins):
+        h.update(Path(chemin).read_bytes())
+    return h.hexdigest()
+
+
+def cle_etape(*elements):
+    """Combine des empreintes (ou toute valeur convertible en texte) en une clé."""
+    h = hashlib.sha256()
+    for element in elements:
+        h.update(str(element).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def lire_manifeste(partition):
+    chemin = Path(partition) / NOM_MANIFESTE
+    if not chemin.exists():
+        return {}
+    try:
+        return json.loads(chemin.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def ecrire_manifeste(partition, manifeste):
+    chemin = Path(partition) / NOM_MANIFESTE
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(".tmp")
+    temporaire.write_text(json.dumps(manifeste, indent=2, sort_keys=True), encoding="utf-8")
+    temporaire.replace(chemin)
+
+
+def etape_a_jour(manifeste, nom, cle, chemin_base):
+    """Vrai si l'étape a déjà été produite avec cette clé et que sa table existe encore."""
+    if manifeste.get(nom) != cle:
+        return False
+    try:
+        trouver_table(chemin_base)
+    except FileNotFoundError:
+        return False
+    return True
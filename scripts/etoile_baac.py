@@ -0,0 +1,195 @@
+# =====================================================================
+# MODÈLE EN ÉTOILE DES TABLES BAAC
+# =====================================================================
+# Au lieu d'une table fusionnée qui recopie les colonnes de l'accident,
+# du lieu et du véhicule sur chaque usager, la partition d'une année
+# garde une table de faits (un usager par ligne) avec des clés entières
+# vers trois dimensions : caract (accident), lieux et vehicules. Une clé
+# est la position de la ligne dans sa dimension : la jointure se fait à
+# la lecture, par un simple take sur les seules colonnes demandées.
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from stockage_baac import ouvrir_table
+
+TABLE_FAITS = "faits"
+
+# Dimension -> (clé étrangère dans les faits, colonnes de jointure
+# possibles, par ordre de préférence). Avant 2019, usagers et véhicules
+# n'ont pas d'id_vehicule : ils sont reliés par Num_Acc + num_veh.
+DIMENSIONS = {
+    "caract": ("cle_accident", [["Num_Acc"]]),
+    "lieux": ("cle_lieu", [["Num_Acc"]]),
+    "vehicules": ("cle_vehicule", [["Num_Acc", "id_vehicule"], ["Num_Acc", "num_veh"]]),
+}
+CLES = [cle for cle, _ in DIMENSIONS.values()]
+# Colonnes qui ne servent qu'à la jointure : retirées des faits une fois les clés posées
+COLONNES_JOINTURE_FAITS = ["num_veh"]
+
+
+def colonnes_jointure(nom, dimension, faits):
+    """Première clé métier de DIMENSIONS[nom] présente dans la dimension et dans les faits."""
+    for colonnes in DIMENSIONS[nom][1]:
+        if all(col in dimension.columns and col in faits.columns for col in colonnes):
+            return colonnes
+    raise KeyError(f"Aucune clé de jointure {DIMENSIONS[nom][1]} commune aux faits et à la dimension {nom}")
+
+
+def encoder_cles(dimension, faits, colonnes):
+    """
+    Encode la clé métier (une ou plusieurs colonnes) des deux côtés d'une
+    jointure en un entier int64 unique : chaque colonne est factorisée sur
+    l'union des deux tables (les id_vehicule texte deviennent des codes
+    compacts), puis les codes sont combinés en base mixte. Une clé
+    incomplète vaut -1 côté dimension et -2 côté faits : elle ne joint pas.
+    """
+    n_dimension = len(dimension)
+    cles = np.zeros(n_dimension + len(faits), dtype=np.int64)
+    incompletes = np.zeros(len(cles), dtype=bool)
+    for col in colonnes:
+        valeurs = pd.concat([dimension[col], faits[col]], ignore_index=True)
+        codes, modalites = pd.factorize(valeurs, use_na_sentinel=True)
+        cles = cles * max(len(modalites), 1) + np.maximum(codes, 0)
+        incompletes |= codes < 0
+
+    cles_dimension, cles_faits = cles[:n_dimension], cles[n_dimension:]
+    cles_dimension[incompletes[:n_dimension]] = -1
+    cles_faits[incompletes[n_dimension:]] = -2
+    return cles_dimension, cles_faits
+
+
+def positions_dimension(dimension, faits, colonnes):
+    """
+    Position dans dimension de la ligne correspondant à chaque fait
+    (première occurrence si la clé métier est dupliquée, NA si absente),
+    et rapport d'intégrité de la jointure.
+
+    La jointure est triée : les clés de la dimension sont ordonnées une
+    fois, chaque fait est placé par recherche dichotomique (searchsorted).
+    """
+    cles_dimension, cles_faits = encoder_cles(dimension, faits, colonnes)
+    ordre = np.argsort(cles_dimension, kind="stable")
+    triees = cles_dimension[ordre]
+    debut = np.searchsorted(triees, cles_faits, side="left")
+    fin = np.searchsorted(triees, cles_faits, side="right")
+    correspondances = fin - debut
+    presentes = correspondances > 0
+
+    cles = np.zeros(len(cles_faits), dtype=np.int32)
+    # Tri stable : ordre[debut] est la première occurrence de la clé
+    cles[presentes] = ordre[debut[presentes]]
+
+    valides = cles_dimension[cles_dimension >= 0]
+    rapport = {
+        "faits": len(cles_faits),
+        "orphelins": int((~presentes).sum()),
+        "cles_dupliquees": int(valides.size - np.unique(valides).size),
+        "dimension_sans_fait": int(len(cles_dimension) - np.unique(cles[presentes]).size),
+        # Lignes qu'aurait produites un merge left classique, par fait
+        "eclatement": float(np.maximum(correspondances, 1).sum() / max(len(cles_faits), 1)),
+    }
+    return pd.arrays.IntegerArray(cles, ~presentes), rapport
+
+
+def afficher_rapport_jointure(nom, rapport):
+    print(
+        f"Jointure {nom} : {rapport['faits']} lignes, {rapport['orphelins']} orphelines, "
+        f"{rapport['cles_dupliquees']} clés dupliquées, {rapport['dimension_sans_fait']} lignes "
+        f"de dimension sans correspondance, éclatement x{rapport['eclatement']:.3f}"
+    )
+    if rapport["eclatement"] > 1:
+        print(f"  ATTENTION : un merge sur {nom} multiplierait les lignes (clés dupliquées)")
+
+
+def construire_faits(usagers, dimensions):
+    """Table de faits : les usagers et leurs clés vers chaque dimension."""
+    faits = usagers.copy()
+    for nom, (cle, _) in DIMENSIONS.items():
+        colonnes = colonnes_jointure(nom, dimensions[nom], faits)
+        faits[cle], rapport = positions_dimension(dimensions[nom], faits, colonnes)
+        afficher_rapport_jointure(f"{nom} ({' + '.join(colonnes)})", rapport)
+    return faits.drop(columns=COLONNES_JOINTURE_FAITS, errors="ignore")
+
+
+def ouvrir_partition(partition):
+    """
+    Faits et dimensions d'une partition, ouverts une fois (memory map
+    pour l'Arrow IPC) : {table: pyarrow.Table}. Aucune colonne n'est lue
+    avant d'être jointe.
+    """
+    partition = Path(partition)
+    return {nom: ouvrir_table(partition / nom) for nom in (TABLE_FAITS, *DIMENSIONS)}
+
+
+def joindre_tables(tables, colonnes=None):
+    """
+    Reconstitue la vue usager de tables ouvertes par ouvrir_partition en
+    ne joignant que les colonnes demandées (toutes si colonnes vaut None).
+    Une colonne présente dans plusieurs tables est prise dans les faits,
+    puis dans l'ordre de DIMENSIONS.
+    """
+    faits = tables[TABLE_FAITS]
+    colonnes_faits = [col for col in faits.column_names if col not in CLES]
+    retenues = colonnes_faits if colonnes is None else [col for col in colonnes if col in colonnes_faits]
+    prises = set(colonnes_faits)
+
+    table = faits.select(retenues)
+    for nom, (cle, _) in DIMENSIONS.items():
+        colonnes_dim = tables[nom].column_names
+        voulues = [
+            col for col in (colonnes_dim if colonnes is None else colonnes)
+            if col in colonnes_dim and col not in prises
+        ]
+        if not voulues:
+            continue
+        prises.update(voulues)
+        jointes = tables[nom].select(voulues).take(faits.column(cle))
+        for col in voulues:
+            table = table.append_column(col, jointes.column(col))
+
+    if colonnes is not None:
+        table = table.select([col for col in colonnes if col in table.column_names])
+    return table
+
+
+def joindre_partition(partition, colonnes=None):
+    """Vue usager d'une partition (voir joindre_tables)."""
+    return joindre_tables(ouvrir_partition(partition), colonnes)
+
+
+def ouvrir_etoile(dossier, annees):
+    """Tables ouvertes des années sélectionnées : {annee: {table: pyarrow.Table}}."""
+    return {annee: ouvrir_partition(Path(dossier) / f"annee={annee}") for annee in annees}
+
+
+def tranche_etoile(etoile, debut, fin):
+    """
+    Tables ouvertes par ouvrir_etoile restreintes aux lignes [debut, fin)
+    de leur vue jointe : joindre_etoile ne joint alors que ces lignes.
+    """
+    tranche = {}
+    for annee, tables in etoile.items():
+        lignes = tables[TABLE_FAITS].num_rows
+        premiere, derniere = max(debut, 0), min(fin, lignes)
+        if premiere < derniere:
+            tranche[annee] = {**tables, TABLE_FAITS: tables[TABLE_FAITS].slice(premiere, derniere - premiere)}
+        debut -= lignes
+        fin -= lignes
+    return tranche
+
+
+def joindre_etoile(etoile, colonnes=None):
+    """
+    Vue usager des années ouvertes par ouvrir_etoile (une pyarrow.Table
+    avec la colonne annee), jointe à la volée depuis faits et dimensions.
+    """
+    morceaux = []
+    for annee, tables in etoile.items():
+        morceau = joindre_tables(tables, colonnes)
+        morceaux.append(morceau.append_column("annee", pa.array([annee] * morceau.num_rows, pa.int16())))
+    if not morceaux:
+        return pa.table({"annee": pa.array([], pa.int16())})
+    return pa.concat_tables(morceaux, promote_options="default")
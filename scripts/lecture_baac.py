@@ -0,0 +1,153 @@
+# =====================================================================
+# LECTURE TYPÉE DES FICHIERS BRUTS BAAC
+# =====================================================================
+# Les types, le séparateur décimal des coordonnées et les jetons de
+# valeurs manquantes sont déclarés avant la lecture : le CSV est parsé
+# en une seule passe vers des entiers compacts (Int8/Int16), sans
+# passage par object/float64 puis reconversion dans le nettoyage.
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    MOTEUR_PAR_DEFAUT = "pyarrow"
+except ImportError:
+    MOTEUR_PAR_DEFAUT = "c"
+
+# Champs vides, espaces isolés et marqueurs d'erreur de l'export BAAC
+VALEURS_MANQUANTES = ["", " ", "#ERREUR", "#VALEURMULTI", "N/A"]
+
+# Identifiants contenant des espaces (insécables) de séparation des milliers
+IDENTIFIANTS = ["id_vehicule", "id_usager"]
+
+SCHEMAS_BRUTS = {
+    "caract": {
+        "Num_Acc": "int64",
+        "jour": "Int8",
+        "mois": "Int8",
+        "an": "Int16",
+        "hrmn": "string",
+        "lum": "Int8",
+        "dep": "category",
+        "com": "category",
+        "agg": "Int8",
+        "int": "Int8",
+        "atm": "Int8",
+        "col": "Int8",
+        "adr": "string",
+        "lat": "float64",
+        "long": "float64",
+    },
+    "lieux": {
+        "Num_Acc": "int64",
+        "catr": "Int8",
+        "voie": "string",
+        "v1": "Int8",
+        "v2": "string",
+        "circ": "Int8",
+        "nbv": "string",
+        "vosp": "Int8",
+        "prof": "Int8",
+        "pr": "string",
+        "pr1": "string",
+        "plan": "Int8",
+        "lartpc": "string",
+        "larrout": "string",
+        "surf": "Int8",
+        "infra": "Int8",
+        "situ": "Int8",
+        "vma": "Int16",
+    },
+    "usagers": {
+        "Num_Acc": "int64",
+        "id_usager": "string",
+        "id_vehicule": "string",
+        "num_veh": "string",
+        "place": "Int8",
+        "catu": "Int8",
+        "grav": "Int8",
+        "sexe": "Int8",
+        "an_nais": "Int16",
+        "trajet": "Int8",
+        "secu1": "Int8",
+        "secu2": "Int8",
+        "secu3": "Int8",
+        "locp": "Int8",
+        "actp": "string",
+        "etatp": "Int8",
+    },
+    "vehicules": {
+        "Num_Acc": "int64",
+        "id_vehicule": "string",
+        "num_veh": "string",
+        "senc": "Int8",
+        "catv": "Int8",
+        "obs": "Int8",
+        "obsm": "Int8",
+        "choc": "Int8",
+        "manv": "Int8",
+        "motor": "Int8",
+        "occutc": "Int16",
+    },
+}
+
+
+def normaliser_identifiants(df):
+    """Supprime en une passe les espaces et espaces insécables des identifiants."""
+    for col in IDENTIFIANTS:
+        if col in df.columns:
+            df[col] = df[col].astype("string").str.replace(r"[\s\xa0]", "", regex=True)
+    return df
+
+
+def lire_csv_brut(chemin, table, sep=";", encoding="utf-8", moteur=MOTEUR_PAR_DEFAUT, colonnes=None):
+    """
+    Lit un fichier brut BAAC avec les types déclarés dans SCHEMAS_BRUTS.
+
+    Les colonnes absentes du schéma (anciens millésimes) restent inférées
+    par pandas ; les coordonnées sont lues avec la virgule décimale.
+    colonnes restreint la lecture aux seules colonnes demandées.
+    """
+    entete = pd.read_csv(chemin, sep=sep, encoding=encoding, nrows=0).columns
+    if colonnes is not None:
+        entete = [col for col in entete if col in colonnes]
+    types = {col: type_ for col, type_ in SCHEMAS_BRUTS[table].items() if col in entete}
+
+    df = pd.read_csv(
+        chemin,
+        sep=sep,
+        encoding=encoding,
+        dtype=types,
+        decimal="," if sep != "," else ".",
+        na_values=VALEURS_MANQUANTES,
+        engine=moteur,
+        usecols=None if colonnes is None else list(entete),
+    )
+    return normaliser_identifiants(df)
+
+
+def lire_csv_brut_par_blocs(chemin, table, taille_bloc, sep=";", encoding="utf-8"):
+    """
+    Variante de lire_csv_brut qui renvoie un itérateur de blocs de
+    taille_bloc lignes (moteur C, seul à gérer chunksize).
+
+    Les colonnes category sont lues en string : des dictionnaires
+    différents d'un bloc à l'autre empêcheraient l'écriture en continu.
+    """
+    entete = pd.read_csv(chemin, sep=sep, encoding=encoding, nrows=0).columns
+    types = {
+        col: "string" if type_ == "category" else type_
+        for col, type_ in SCHEMAS_BRUTS[table].items()
+        if col in entete
+    }
+
+    lecteur = pd.read_csv(
+        chemin,
+        sep=sep,
+        encoding=encoding,
+        dtype=types,
+        decimal="," if sep != "," else ".",
+        na_values=VALEURS_MANQUANTES,
+        chunksize=taille_bloc,
+    )
+    for bloc in lecteur:
+        yield normaliser_identifiants(bloc)
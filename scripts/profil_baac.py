@@ -0,0 +1,346 @@
+# =====================================================================
+# PROFIL QUALITÉ DES TABLES BAAC
+# =====================================================================
+# Remplace les diagnostics imprimés (info / isna / duplicated) par un
+# profil calculé en une passe par colonne : pd.factorize donne à la fois
+# les valeurs manquantes, le nombre de modalités et le code de chaque
+# ligne ; min / max, bornes et formats (regles_baac) sont évalués sur les
+# seules modalités puis reportés aux lignes par comptage des codes.
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from regles_baac import regles_colonne
+
+# Clé dont les doublons sont comptés pour chaque table
+CLES_DOUBLONS = {
+    "caract": ["Num_Acc"],
+    "lieux": ["Num_Acc"],
+    "usagers": ["Num_Acc", "id_usager"],
+    "vehicules": ["Num_Acc", "id_vehicule"],
+}
+
+# Colonnes qui doivent valoir l'année traitée (ex-diagnostic « Année incohérente »)
+COLONNES_ANNEE = {
+    "caract": ["an"],
+}
+
+
+# Au-delà de ce nombre de modalités, seules les TOP_MODALITES plus
+# fréquentes sont conservées et les quantiles fusionnés sont lus sur
+# l'esquisse : quantiles de la colonne en TAILLE_ESQUISSE probabilités
+# régulières, fusionnables d'une année à l'autre (erreur de rang < 0,5 %)
+MAX_MODALITES_STOCKEES = 5000
+TOP_MODALITES = 20
+QUANTILES = [0.25, 0.5, 0.75]
+TAILLE_ESQUISSE = 201
+PROBAS_ESQUISSE = np.linspace(0, 1, TAILLE_ESQUISSE)
+
+
+def _valeur_json(valeur):
+    """Convertit un scalaire numpy / pandas en valeur sérialisable en JSON."""
+    if valeur is None or (not isinstance(valeur, str) and pd.isna(valeur)):
+        return None
+    if isinstance(valeur, np.generic):
+        return valeur.item()
+    if isinstance(valeur, (int, float, str, bool)):
+        return valeur
+    return str(valeur)
+
+
+def _est_numerique(serie):
+    return pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype)
+
+
+def quantiles_effectifs(valeurs, effectifs, probas=QUANTILES):
+    """Quantiles (interpolation linéaire, comme describe) d'une distribution donnée par ses effectifs."""
+    ordre = np.argsort(valeurs, kind="stable")
+    valeurs = np.asarray(valeurs, dtype=float)[ordre]
+    cumul = np.cumsum(np.asarray(effectifs)[ordre])
+    position = np.asarray(probas, dtype=float) * (cumul[-1] - 1)
+    bas, haut = np.floor(position), np.ceil(position)
+    # La k-ième valeur triée est la première dont l'effectif cumulé dépasse k
+    v_bas = valeurs[np.searchsorted(cumul, bas, side="right")]
+    v_haut = valeurs[np.searchsorted(cumul, haut, side="right")]
+    return (v_bas + (v_haut - v_bas) * (position - bas)).tolist()
+
+
+def fusionner_esquisses(esquisses):
+    """
+    Esquisse d'une réunion d'années à partir des (effectif, esquisse) de
+    chacune : la fonction de répartition du mélange (moyenne des
+    répartitions, pondérée par les effectifs) est inversée aux
+    PROBAS_ESQUISSE.
+    """
+    total = sum(effectif for effectif, _ in esquisses)
+    points = np.unique(np.concatenate([np.asarray(esquisse, dtype=float) for _, esquisse in esquisses]))
+    repartition = sum(
+        effectif * np.interp(points, esquisse, PROBAS_ESQUISSE, left=0.0, right=1.0)
+        for effectif, esquisse in esquisses
+    ) / total
+    return np.interp(PROBAS_ESQUISSE, repartition, points).tolist()
+
+
+def quantiles_esquisse(esquisse, probas=QUANTILES):
+    return np.interp(probas, PROBAS_ESQUISSE, esquisse).tolist()
+
+
+def profiler_colonne(serie, regles, annee=None):
+    """
+    Profil d'une colonne et codes de ses lignes (-1 = manquant). Avec
+    annee, hors_annee compte les valeurs renseignées différentes de annee.
+
+    Les statistiques sont stockées sous une forme fusionnable d'une année
+    à l'autre : effectifs par modalité (toutes si elles sont au plus
+    MAX_MODALITES_STOCKEES, sinon les plus fréquentes), moyenne et somme
+    des carrés des écarts (m2) pour les colonnes numériques.
+    """
+    codes, modalites = pd.factorize(serie, use_na_sentinel=True)
+    effectifs = np.bincount(codes[codes >= 0], minlength=len(modalites))
+    profil = {
+        "colonne": serie.name,
+        "type": str(serie.dtype),
+        "manquants": int((codes < 0).sum()),
+        "effectif": int(effectifs.sum()),
+        "distincts": len(modalites),
+        "min": None,
+        "max": None,
+        "hors_plage": 0,
+        "format_invalide": 0,
+        "hors_annee": 0,
+        "numerique": _est_numerique(serie),
+        "frequences": [],
+        "frequences_completes": True,
+    }
+    if len(modalites):
+        modalites = pd.Series(modalites)
+        if pd.api.types.is_numeric_dtype(modalites) or pd.api.types.is_string_dtype(modalites):
+            try:
+                profil["min"] = _valeur_json(modalites.min())
+                profil["max"] = _valeur_json(modalites.max())
+            except TypeError:
+                pass  # modalités de types mélangés (colonne object)
+        if "plage" in regles:
+            minv, maxv = regles["plage"]
+            valeurs = pd.to_numeric(modalites, errors="coerce")
+            hors = ((valeurs < minv) | (valeurs > maxv)).fillna(False).to_numpy(dtype=bool)
+            profil["hors_plage"] = int(effectifs[hors].sum())
+        if "format" in regles:
+            valide = modalites.astype("string").str.fullmatch(regles["format"]).fillna(False).to_numpy(dtype=bool)
+            profil["format_invalide"] = int(effectifs[~valide].sum())
+        if annee is not None:
+            autre = (pd.to_numeric(modalites, errors="coerce") != annee).to_numpy(dtype=bool)
+            profil["hors_annee"] = int(effectifs[autre].sum())
+
+        complet = len(modalites) <= MAX_MODALITES_STOCKEES
+        ordre = np.argsort(-effectifs, kind="stable")
+        profil["frequences"] = [
+            [_valeur_json(modalites.iloc[i]), int(effectifs[i])]
+            for i in (ordre if complet else ordre[:TOP_MODALITES])
+        ]
+        profil["frequences_completes"] = complet
+
+        if profil["numerique"]:
+            valeurs = modalites.to_numpy(dtype=float)
+            moyenne = float((valeurs * effectifs).sum() / effectifs.sum())
+            profil["moyenne"] = moyenne
+            profil["m2"] = float((effectifs * (valeurs - moyenne) ** 2).sum())
+            if complet:
+                profil["quantiles"] = quantiles_effectifs(valeurs, effectifs)
+                profil["esquisse"] = quantiles_effectifs(valeurs, effectifs, PROBAS_ESQUISSE)
+            else:
+                lignes = serie.dropna().to_numpy(dtype=float)
+                profil["quantiles"] = np.quantile(lignes, QUANTILES).tolist()
+                profil["esquisse"] = np.quantile(lignes, PROBAS_ESQUISSE).tolist()
+    return profil, codes, len(modalites)
+
+
+def profiler_table(df, table=None, annee=None):
+    """
+    Profil complet d'une table : une entrée par colonne et le nombre de
+    doublons sur la clé CLES_DOUBLONS[table], obtenu à partir des codes
+    déjà calculés pour chaque colonne (aucun balayage supplémentaire).
+    """
+    lignes = len(df)
+    colonnes = []
+    codes_cle = {}
+    cle = [col for col in CLES_DOUBLONS.get(table, []) if col in df.columns]
+    for col in df.columns:
+        regles = regles_colonne(table, col) if table in CLES_DOUBLONS else {}
+        annee_attendue = annee if col in COLONNES_ANNEE.get(table, []) else None
+        profil, codes, n_modalites = profiler_colonne(df[col], regles, annee_attendue)
+        profil["taux_manquants"] = profil["manquants"] / lignes if lignes else 0.0
+        colonnes.append(profil)
+        if col in cle:
+            codes_cle[col] = (codes, n_modalites)
+
+    doublons = None
+    if cle:
+        combinee = np.zeros(lignes, dtype=np.int64)
+        for col in cle:
+            codes, n_modalites = codes_cle[col]
+            combinee = combinee * (n_modalites + 1) + (codes + 1)
+        doublons = int(lignes - np.unique(combinee).size)
+
+    return {
+        "table": table,
+        "annee": annee,
+        "lignes": lignes,
+        "cle": cle,
+        "doublons": doublons,
+        "colonnes": colonnes,
+    }
+
+
+def colonnes_profil(profil):
+    """Entrées par colonne d'un profil, sous forme de DataFrame."""
+    return pd.DataFrame(profil["colonnes"])
+
+
+def afficher_profil(profil):
+    print(f"\n=== PROFIL {str(profil['table']).upper()} {profil['annee']} ===")
+    print(f"Lignes : {profil['lignes']} - Colonnes : {len(profil['colonnes'])}")
+    if profil["cle"]:
+        print(f"Doublons {' + '.join(profil['cle'])} : {profil['doublons']}")
+    resume = colonnes_profil(profil)[
+        ["colonne", "type", "manquants", "distincts", "min", "max", "hors_plage", "format_invalide", "hors_annee"]
+    ]
+    print(resume.to_string(index=False))
+
+
+def chemin_profil(partition, nom):
+    return Path(partition) / f"profil_{nom}.json"
+
+
+def ecrire_profil(profil, partition, nom):
+    """Écrit le profil en JSON dans la partition (écriture atomique)."""
+    chemin = chemin_profil(partition, nom)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(".tmp")
+    temporaire.write_text(json.dumps(profil, ensure_ascii=False), encoding="utf-8")
+    temporaire.replace(chemin)
+    return chemin
+
+
+def lire_profil(partition, nom):
+    """Profil écrit par le pipeline, ou None s'il n'existe pas."""
+    chemin = chemin_profil(partition, nom)
+    if not chemin.exists():
+        return None
+    return json.loads(chemin.read_text(encoding="utf-8"))
+
+
+def _fusionner_entree(courant, entree):
+    """Ajoute à courant le profil d'une même colonne pour une autre année."""
+    for champ in ["manquants", "hors_plage", "format_invalide", "hors_annee"]:
+        # hors_annee est absent des profils écrits avant son ajout
+        courant[champ] = courant.get(champ, 0) + entree.get(champ, 0)
+    for champ, choisir in [("min", min), ("max", max)]:
+        valeurs = [v for v in (courant[champ], entree[champ]) if v is not None]
+        try:
+            courant[champ] = choisir(valeurs) if valeurs else None
+        except TypeError:
+            courant[champ] = None
+
+    n_a, n_b = courant["effectif"], entree["effectif"]
+    if "moyenne" in entree and "moyenne" in courant:
+        # Fusion des moyennes et m2 (Chan et al.)
+        ecart = entree["moyenne"] - courant["moyenne"]
+        total = n_a + n_b
+        courant["moyenne"] += ecart * n_b / total
+        courant["m2"] += entree["m2"] + ecart ** 2 * n_a * n_b / total
+        # Quantiles lus sur l'esquisse fusionnée (recalculés exactement à la
+        # fin si les fréquences sont complètes) ; inconnus sans esquisse
+        if courant.get("esquisse") and entree.get("esquisse"):
+            courant["esquisse"] = fusionner_esquisses([(n_a, courant["esquisse"]), (n_b, entree["esquisse"])])
+            courant["quantiles"] = quantiles_esquisse(courant["esquisse"])
+        else:
+            courant["esquisse"] = None
+            courant["quantiles"] = [None] * len(QUANTILES)
+    elif "moyenne" in entree:
+        for champ in ["moyenne", "m2", "quantiles", "esquisse"]:
+            courant[champ] = entree.get(champ)
+    courant["effectif"] = n_a + n_b
+
+    frequences = dict((valeur, n) for valeur, n in courant["frequences"])
+    for valeur, n in entree["frequences"]:
+        frequences[valeur] = frequences.get(valeur, 0) + n
+    courant["frequences"] = sorted(([v, n] for v, n in frequences.items()), key=lambda x: -x[1])
+    courant["frequences_completes"] = courant["frequences_completes"] and entree["frequences_completes"]
+    courant["distincts"] = max(courant["distincts"], entree["distincts"])
+
+
+def fusionner_profils(profils):
+    """
+    Profil de plusieurs années à partir de leurs profils, sans relire les
+    lignes : ajouter une année ne demande que le profil de sa partition.
+
+    Effectifs additionnés, min / max combinés, moyennes et variances
+    fusionnées exactement. Quand toutes les années ont leurs fréquences
+    complètes, modalités, mode et quantiles sont exacts ; sinon le nombre
+    de modalités est une borne basse et les quantiles sont lus sur
+    l'esquisse fusionnée (vides pour un profil écrit sans esquisse).
+    Une colonne absente d'une année y compte comme manquante.
+    """
+    lignes = sum(profil["lignes"] for profil in profils)
+    fusion = {}
+    presentes = {}
+    for profil in profils:
+        for entree in profil["colonnes"]:
+            presentes[entree["colonne"]] = presentes.get(entree["colonne"], 0) + profil["lignes"]
+            if entree["colonne"] not in fusion:
+                fusion[entree["colonne"]] = json.loads(json.dumps(entree))
+            else:
+                _fusionner_entree(fusion[entree["colonne"]], entree)
+
+    for colonne, entree in fusion.items():
+        entree["manquants"] += lignes - presentes[colonne]
+        entree["taux_manquants"] = entree["manquants"] / lignes if lignes else 0.0
+        if entree["frequences_completes"]:
+            entree["distincts"] = len(entree["frequences"])
+            if entree.get("numerique") and entree["frequences"]:
+                valeurs, effectifs = zip(*entree["frequences"])
+                entree["quantiles"] = quantiles_effectifs(np.array(valeurs, dtype=float), np.array(effectifs))
+        else:
+            entree["frequences"] = entree["frequences"][:TOP_MODALITES]
+
+    doublons = [profil["doublons"] for profil in profils if profil["doublons"] is not None]
+    return {
+        "table": profils[0]["table"] if profils else None,
+        "annee": [profil["annee"] for profil in profils],
+        "lignes": lignes,
+        "cle": profils[0]["cle"] if profils else [],
+        "doublons": sum(doublons) if doublons else None,
+        "colonnes": list(fusion.values()),
+    }
+
+
+def statistiques_descriptives(profil):
+    """
+    Équivalent de describe(include="all").transpose() construit à partir
+    d'un profil : count / unique / top / freq pour toutes les colonnes,
+    mean / std / min / quartiles / max pour les colonnes numériques.
+    """
+    lignes = []
+    for entree in profil["colonnes"]:
+        ligne = {"Variable": entree["colonne"], "count": entree["effectif"]}
+        if entree.get("numerique") and "moyenne" in entree:
+            n = entree["effectif"]
+            ligne.update({
+                "mean": entree["moyenne"],
+                "std": np.sqrt(entree["m2"] / (n - 1)) if n > 1 else np.nan,
+                "min": entree["min"],
+                **{
+                    f"{proba:.0%}": np.nan if quantile is None else quantile
+                    for proba, quantile in zip(QUANTILES, entree["quantiles"])
+                },
+                "max": entree["max"],
+            })
+        elif entree["frequences"]:
+            top, freq = entree["frequences"][0]
+            ligne.update({"unique": entree["distincts"], "top": top, "freq": freq})
+        lignes.append(ligne)
+    colonnes = ["Variable", "count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    return pd.DataFrame(lignes).reindex(columns=colonnes)
@@ -0,0 +1,136 @@
+# =====================================================================
+# RÈGLES DE VALIDATION DES TABLES BAAC
+# =====================================================================
+# Les règles (codes aberrants, conversion numérique, bornes issues de la
+# documentation BAAC, format) sont déclarées une seule fois par table et
+# par colonne. Chaque colonne est évaluée en une passe : un masque des
+# valeurs invalides cumule toutes ses règles et la colonne est réécrite
+# une seule fois, tandis que chaque règle compte ses propres violations.
+import numpy as np
+import pandas as pd
+
+from schema_baac import TYPES_CODES, convertir_code
+
+# "*" : règle appliquée à toutes les colonnes de la table. Le type de
+# sortie des codes est celui du schéma compact (schema_baac.TYPES_CODES) :
+# seuls les identifiants, hors schéma, déclarent le leur.
+REGLES_VALIDATION = {
+    "caract": {
+        "jour": {"numerique": True, "plage": (1, 31)},
+        "mois": {"numerique": True, "plage": (1, 12)},
+        "an": {"numerique": True, "plage": (1900, 2100)},
+        # Heure normalisée en "HH:MM" (normaliser_caract) : contrôle de
+        # format, et non de bornes numériques 0-2359 sur une chaîne
+        "hrmn": {"format": r"^(?:[01]\d|2[0-3]):[0-5]\d$"},
+        "lum": {"numerique": True, "plage": (1, 5)},
+        "agg": {"numerique": True, "plage": (1, 2)},
+        "int": {"numerique": True, "plage": (1, 8)},
+        "atm": {"numerique": True, "plage": (1, 9)},
+        "col": {"numerique": True, "plage": (1, 7)},
+    },
+    "lieux": {
+        "voie": {"numerique": True},
+        "v2": {"numerique": True},
+        "pr": {"numerique": True},
+        "pr1": {"numerique": True},
+        "larrout": {"numerique": True},
+        "nbv": {"numerique": True},
+        "catr": {"plage": (1, 9)},
+        "circ": {"plage": (1, 9)},
+        "prof": {"plage": (0, 9)},
+        "plan": {"plage": (1, 9)},
+        "surf": {"plage": (1, 9)},
+        "infra": {"plage": (0, 9)},
+        "situ": {"plage": (1, 8)},
+        "vma": {"plage": (0, 150)},
+    },
+    "usagers": {
+        "*": {"aberrants": [-1, 0, 99, 999, "99", "0"]},
+        "Num_Acc": {"type": "Int64"},
+        "id_usager": {"type": "Int64"},
+        "sexe": {"numerique": True, "plage": (1, 2)},
+        "grav": {"numerique": True, "plage": (1, 4)},
+        "trajet": {"numerique": True, "plage": (1, 9)},
+        "locp": {"numerique": True, "plage": (1, 9)},
+        "actp": {"numerique": True, "plage": (1, 13)},
+        "place": {"numerique": True, "plage": (1, 9)},
+    },
+    "vehicules": {
+        # Pas de 99 : la catégorie « autres » de catv va jusqu'à 99
+        "*": {"aberrants": [-1, 0, 999, "0"]},
+        "senc": {"numerique": True, "plage": (1, 3)},
+        "catv": {"numerique": True, "plage": (1, 99)},
+        "choc": {"numerique": True, "plage": (1, 9)},
+        "manv": {"numerique": True, "plage": (1, 26)},
+        "motor": {"numerique": True, "plage": (1, 6)},
+    },
+}
+
+
+def regles_colonne(table, colonne):
+    """Règles d'une colonne : règles "*" de la table complétées par celles de la colonne."""
+    regles = REGLES_VALIDATION[table]
+    regles = {**regles.get("*", {}), **regles.get(colonne, {})}
+    if regles and colonne in TYPES_CODES:
+        regles["type"] = TYPES_CODES[colonne]
+    return regles
+
+
+def valider_colonne(serie, regles, rapport, colonne):
+    """Évalue toutes les règles d'une colonne et renvoie la colonne nettoyée."""
+    invalides = np.zeros(len(serie), dtype=bool)
+
+    if "aberrants" in regles:
+        masque = serie.isin(regles["aberrants"]).to_numpy(dtype=bool)
+        rapport.append((colonne, "aberrants", int(masque.sum())))
+        invalides |= masque
+
+    if "numerique" in regles or "plage" in regles:
+        valeurs = pd.to_numeric(serie, errors="coerce")
+        if "numerique" in regles:
+            # Valeurs renseignées mais illisibles comme nombre
+            masque = (valeurs.isna() & serie.notna()).to_numpy(dtype=bool) & ~invalides
+            rapport.append((colonne, "numerique", int(masque.sum())))
+            invalides |= masque
+            serie = valeurs
+        if "plage" in regles:
+            minv, maxv = regles["plage"]
+            masque = ((valeurs < minv) | (valeurs > maxv)).fillna(False).to_numpy(dtype=bool) & ~invalides
+            rapport.append((colonne, "plage", int(masque.sum())))
+            invalides |= masque
+
+    if "format" in regles:
+        texte = serie.astype("string")
+        masque = (~texte.str.fullmatch(regles["format"]) & texte.notna()).fillna(False).to_numpy(dtype=bool) & ~invalides
+        rapport.append((colonne, "format", int(masque.sum())))
+        invalides |= masque
+
+    if invalides.any():
+        serie = serie.mask(invalides)
+    if "type" in regles:
+        serie = convertir_code(serie, regles["type"])
+    return serie
+
+
+def valider_table(df, table):
+    """
+    Applique les règles de REGLES_VALIDATION[table] aux colonnes présentes.
+
+    Renvoie la table nettoyée (copie) et le rapport des violations : une
+    ligne par (colonne, règle) avec le nombre de valeurs passées à NA.
+    Chaque valeur invalide n'est comptée que pour la première règle violée.
+    """
+    df = df.copy()
+    rapport = []
+    for colonne in df.columns:
+        regles = regles_colonne(table, colonne)
+        if regles:
+            df[colonne] = valider_colonne(df[colonne], regles, rapport, colonne)
+    return df, pd.DataFrame(rapport, columns=["colonne", "regle", "violations"])
+
+
+def afficher_rapport_regles(table, rapport):
+    violations = rapport[rapport["violations"] > 0]
+    print(f"Règles de validation ({table}) : {int(rapport['violations'].sum())} valeurs invalidées")
+    if not violations.empty:
+        print(violations.to_string(index=False))
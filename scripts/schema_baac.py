@@ -0,0 +1,121 @@
+# =====================================================================
+# SCHÉMA COMPACT DES TABLES BAAC
+# =====================================================================
+# Chaque code BAAC est stocké dans le plus petit entier nullable qui
+# couvre sa nomenclature, chaque libellé en category ordonnée. Le schéma
+# est appliqué à l'export et à la relecture : la table finale garde
+# quelques octets par ligne et les regroupements portent sur des codes.
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from variables_derivees import (
+    ORDRE_GRAVITE,
+    ORDRE_PERIODE,
+    ORDRE_TRANCHE_AGE,
+    ORDRE_VITESSE,
+    ORDRE_ZONE,
+)
+
+ORDRE_SEXE = ["Homme", "Femme"]
+
+# Codes de nomenclature (documentation BAAC) : quelques dizaines de
+# valeurs au plus, sauf années, vitesses et nombres d'occupants
+TYPES_CODES = {
+    # caractéristiques
+    "jour": "Int8",
+    "mois": "Int8",
+    "an": "Int16",
+    "lum": "Int8",
+    "agg": "Int8",
+    "int": "Int8",
+    "atm": "Int8",
+    "col": "Int8",
+    # lieux
+    "catr": "Int8",
+    "v1": "Int8",
+    "circ": "Int8",
+    "nbv": "Int8",
+    "vosp": "Int8",
+    "prof": "Int8",
+    "plan": "Int8",
+    "surf": "Int8",
+    "infra": "Int8",
+    "situ": "Int8",
+    "vma": "Int16",
+    # véhicules
+    "senc": "Int8",
+    "catv": "Int8",
+    "obs": "Int8",
+    "obsm": "Int8",
+    "choc": "Int8",
+    "manv": "Int8",
+    "motor": "Int8",
+    "occutc": "Int16",
+    # usagers
+    "place": "Int8",
+    "catu": "Int8",
+    "grav": "Int8",
+    "sexe": "Int8",
+    "an_nais": "Int16",
+    "age": "Int16",
+    "trajet": "Int8",
+    "secu1": "Int8",
+    "secu2": "Int8",
+    "secu3": "Int8",
+    "locp": "Int8",
+    "etatp": "Int8",
+}
+
+TYPES_LIBELLES = {
+    nom: pd.CategoricalDtype(ordre, ordered=True)
+    for nom, ordre in {
+        "periode": ORDRE_PERIODE,
+        "grav_3_niveaux": ORDRE_GRAVITE,
+        "tranche_age": ORDRE_TRANCHE_AGE,
+        "zone_detaillee": ORDRE_ZONE,
+        "niveau_vitesse": ORDRE_VITESSE,
+        "sexe_label": ORDRE_SEXE,
+    }.items()
+}
+
+# Entiers Arrow relus directement en entiers nullables pandas (sans
+# passer par float64 quand la colonne contient des valeurs manquantes)
+TYPES_ARROW_PANDAS = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+}
+
+
+def convertir_code(serie, type_):
+    """Convertit une colonne de codes vers type_ ; les valeurs hors capacité deviennent NA."""
+    valeurs = pd.to_numeric(serie, errors="coerce")
+    bornes = np.iinfo(type_.lower())
+    invalides = (valeurs < bornes.min) | (valeurs > bornes.max)
+    if pd.api.types.is_float_dtype(valeurs):
+        # Les codes BAAC sont entiers : une partie décimale signale une saisie invalide
+        invalides |= valeurs.round() != valeurs
+    return valeurs.mask(invalides.fillna(False)).astype(type_)
+
+
+def appliquer_schema(df):
+    """
+    Renvoie une copie de df avec les codes en entiers compacts et les
+    libellés en category ordonnée (colonnes absentes ignorées).
+    """
+    df = df.copy(deep=False)
+    for col, type_ in TYPES_CODES.items():
+        if col in df.columns and df[col].dtype != type_:
+            df[col] = convertir_code(df[col], type_)
+    for col, type_ in TYPES_LIBELLES.items():
+        if col in df.columns and df[col].dtype != type_:
+            df[col] = df[col].astype(type_)
+    return df
+
+
+def vers_pandas(table, **options):
+    """Convertit une pyarrow.Table en DataFrame conforme au schéma compact."""
+    df = table.to_pandas(types_mapper=TYPES_ARROW_PANDAS.get, **options)
+    return appliquer_schema(df)
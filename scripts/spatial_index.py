@@ -0,0 +1,90 @@
+# ======================================================
+# SPATIAL INDEX — ACCIDENT COORDINATES
+# ======================================================
+# Fixed-size grid index built once over the cleaned coordinates. Row
+# positions are sorted by grid cell, so a bounding-box or radius query
+# only touches the cells it overlaps (binary search on the cell keys)
+# instead of scanning every row's lat / longitude.
+
+import numpy as np
+
+from viz_map import valid_coordinates
+
+INDEX_CELL_DEGREES = 0.1
+# Column count of the key space: longitudes -180..180 at 0.1° fit easily
+KEY_STRIDE = 1 << 20
+EARTH_RADIUS_KM = 6371.0
+
+
+def build_spatial_index(lat, lon, cell_degrees=INDEX_CELL_DEGREES):
+    """Group the positions of valid coordinates by grid cell."""
+    positions = np.flatnonzero(valid_coordinates(lat, lon))
+    keys = _cell_keys(lat[positions], lon[positions], cell_degrees)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    cell_keys, starts = np.unique(keys, return_index=True)
+    return {
+        "cell_degrees": cell_degrees,
+        "lat": lat,
+        "lon": lon,
+        "positions": positions[order],
+        "cell_keys": cell_keys,
+        "starts": starts,
+        "ends": np.append(starts[1:], keys.size),
+    }
+
+
+def _cell_indices(values, cell_degrees):
+    return np.floor(np.asarray(values, dtype=float) / cell_degrees).astype(np.int64)
+
+
+def _cell_keys(lat, lon, cell_degrees):
+    return _cell_indices(lat, cell_degrees) * KEY_STRIDE + (_cell_indices(lon, cell_degrees) + KEY_STRIDE // 2)
+
+
+def _candidates(index, lat_min, lat_max, lon_min, lon_max):
+    """Positions stored in the grid cells overlapping the box."""
+    size = index["cell_degrees"]
+    row_min, row_max = _cell_indices([lat_min, lat_max], size)
+    col_min, col_max = _cell_indices([lon_min, lon_max], size) + KEY_STRIDE // 2
+
+    # Within one grid row, the overlapped cells form a contiguous key range
+    rows = np.arange(row_min, row_max + 1)
+    first = np.searchsorted(index["cell_keys"], rows * KEY_STRIDE + col_min, side="left")
+    last = np.searchsorted(index["cell_keys"], rows * KEY_STRIDE + col_max, side="right")
+    chunks = [
+        index["positions"][index["starts"][a]:index["ends"][b - 1]]
+        for a, b in zip(first, last)
+        if b > a
+    ]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+
+def query_bbox(index, lat_min, lat_max, lon_min, lon_max):
+    """Sorted positions of the points inside the bounding box (bounds included)."""
+    candidates = _candidates(index, lat_min, lat_max, lon_min, lon_max)
+    lat = index["lat"][candidates]
+    lon = index["lon"][candidates]
+    inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    return np.sort(candidates[inside])
+
+
+def query_radius(index, lat, lon, radius_km):
+    """Sorted positions of the points within radius_km of (lat, lon), great-circle distance."""
+    # Box enclosing the circle on the same sphere as the distance below: the
+    # longitude reach is the one of the circle's tangent meridians, wider
+    # than radius / (R cos lat)
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = np.degrees(angle)
+    reach = np.sin(angle) / max(np.cos(np.radians(lat)), 1e-12)
+    dlon = np.degrees(np.arcsin(reach)) if reach < 1 else 180.0
+    candidates = _candidates(index, lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+
+    # Coordinates are stored as float32: compute distances in float64
+    phi1 = np.radians(lat)
+    phi2 = np.radians(index["lat"][candidates].astype(np.float64))
+    dphi = phi2 - phi1
+    dlambda = np.radians(index["lon"][candidates].astype(np.float64) - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return np.sort(candidates[distance <= radius_km])
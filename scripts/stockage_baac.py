@@ -0,0 +1,170 @@
+# =====================================================================
+# STOCKAGE COLONNAIRE DES TABLES BAAC
+# =====================================================================
+# Export Parquet (ou CSV en secours) des tables nettoyées et relecture
+# avec projection de colonnes pour l'application Streamlit. Les
+# tables lues par l'application (faits et dimensions, cf. etoile_baac)
+# peuvent aussi être écrites en Arrow IPC non compressé, qu'elle
+# ouvre en mémoire partagée (memory map) sans les copier.
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from schema_baac import appliquer_schema, vers_pandas
+
+# Format par défaut des exports : "parquet", "arrow" ou "csv"
+FORMAT_EXPORT = "parquet"
+
+EXTENSIONS = {
+    "arrow": ".arrow",
+    "parquet": ".parquet",
+    "csv": ".csv",
+}
+
+def supprimer_autres_formats(chemin):
+    """Supprime les exports de la même table dans un autre format, que trouver_table lirait en priorité."""
+    for extension in EXTENSIONS.values():
+        autre = chemin.with_suffix(extension)
+        if autre != chemin and autre.exists():
+            autre.unlink()
+
+
+def exporter_table(df, chemin_base, format_export=FORMAT_EXPORT):
+    """
+    Écrit une table nettoyée au format demandé.
+
+    chemin_base : chemin sans extension (ex. "clean/final_2023").
+    Renvoie le chemin du fichier écrit.
+    """
+    chemin = Path(chemin_base).with_suffix(EXTENSIONS[format_export])
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    # Écriture dans un fichier temporaire remplacé d'un coup : une table
+    # Arrow déjà ouverte en memory map garde l'ancien fichier (inode)
+    temporaire = chemin.with_suffix(".tmp")
+
+    if format_export == "csv":
+        df.to_csv(temporaire, index=False)
+    elif format_export == "arrow":
+        table = pa.Table.from_pandas(appliquer_schema(df), preserve_index=False)
+        with pa.OSFile(str(temporaire), "wb") as sortie, pa.ipc.new_file(sortie, table.schema) as ecrivain:
+            ecrivain.write_table(table)
+    else:
+        appliquer_schema(df).to_parquet(temporaire, index=False)
+    temporaire.replace(chemin)
+    supprimer_autres_formats(chemin)
+    return chemin
+
+
+def exporter_par_blocs(blocs, chemin_base, format_export=FORMAT_EXPORT):
+    """
+    Écrit une suite de DataFrames dans un même fichier au format demandé,
+    bloc par bloc, sans jamais concaténer la table complète en mémoire.
+
+    Le schéma du premier bloc fait référence pour les suivants.
+    Renvoie le chemin écrit et le nombre total de lignes.
+    """
+    chemin = Path(chemin_base).with_suffix(EXTENSIONS[format_export])
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(".tmp")
+
+    sortie = ecrivain = schema = None
+    blocs_ecrits = lignes = 0
+    try:
+        for bloc in blocs:
+            if format_export == "csv":
+                premier = blocs_ecrits == 0
+                bloc.to_csv(temporaire, index=False, mode="w" if premier else "a", header=premier)
+            else:
+                table = pa.Table.from_pandas(appliquer_schema(bloc), preserve_index=False)
+                if schema is None:
+                    schema = table.schema
+                    if format_export == "arrow":
+                        sortie = pa.OSFile(str(temporaire), "wb")
+                        ecrivain = pa.ipc.new_file(sortie, schema)
+                    else:
+                        ecrivain = pq.ParquetWriter(temporaire, schema)
+                else:
+                    table = table.cast(schema)
+                ecrivain.write_table(table)
+            blocs_ecrits += 1
+            lignes += len(bloc)
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+        if sortie is not None:
+            sortie.close()
+
+    if blocs_ecrits == 0:
+        raise ValueError(f"Aucun bloc à écrire pour {chemin_base}")
+    temporaire.replace(chemin)
+    supprimer_autres_formats(chemin)
+    return chemin, lignes
+
+
+def trouver_table(chemin_base):
+    """Renvoie le premier fichier existant parmi les formats connus (colonnaire d'abord)."""
+    for format_export in ["arrow", "parquet", "csv"]:
+        chemin = Path(chemin_base).with_suffix(EXTENSIONS[format_export])
+        if chemin.exists():
+            return chemin, format_export
+    raise FileNotFoundError(f"Aucune table trouvée pour {chemin_base}")
+
+
+def ouvrir_table(chemin_base, colonnes=None):
+    """
+    Ouvre une table sous forme de pyarrow.Table.
+
+    Un fichier Arrow IPC est projeté en mémoire (memory map) : les
+    colonnes sélectionnées pointent directement dans le fichier, sans
+    copie ni décodage. Le Parquet est décodé en mémoire.
+    """
+    chemin, format_export = trouver_table(chemin_base)
+    if format_export == "arrow":
+        table = pa.ipc.open_file(pa.memory_map(str(chemin), "r")).read_all()
+    elif format_export == "parquet":
+        table = pq.read_table(chemin, memory_map=True)
+    else:
+        table = pa.Table.from_pandas(lire_table(chemin_base), preserve_index=False)
+
+    if colonnes is not None:
+        table = table.select([col for col in colonnes if col in table.column_names])
+    return table
+
+
+def lire_table(chemin_base, colonnes=None):
+    """
+    Relit une table exportée en ne chargeant que les colonnes demandées.
+
+    Le schéma compact (schema_baac) est réappliqué quel que soit le
+    format ; le CSV reste lisible pour les exports plus anciens.
+    """
+    chemin, format_export = trouver_table(chemin_base)
+
+    if format_export == "arrow":
+        return vers_pandas(ouvrir_table(chemin_base, colonnes))
+
+    if format_export == "parquet":
+        if colonnes is not None:
+            entete = pq.read_schema(chemin).names
+            colonnes = [col for col in colonnes if col in entete]
+        return appliquer_schema(pd.read_parquet(chemin, columns=colonnes))
+
+    if colonnes is not None:
+        entete = pd.read_csv(chemin, nrows=0).columns
+        colonnes = [col for col in colonnes if col in entete]
+    return appliquer_schema(pd.read_csv(chemin, usecols=colonnes))
+
+
+# =====================================================================
+# DATASET PARTITIONNÉ PAR ANNÉE
+# =====================================================================
+def annees_disponibles(dossier):
+    """Liste les années présentes sous la forme dossier/annee=AAAA/."""
+    annees = []
+    for partition in Path(dossier).glob("annee=*"):
+        try:
+            annees.append(int(partition.name.split("=", 1)[1]))
+        except ValueError:
+            continue
+    return sorted(annees)
@@ -0,0 +1,26 @@
+# =====================================================================
+# TRANCHE DE LA VUE JOINTE DE PLUSIEURS ANNÉES
+# =====================================================================
+import pyarrow as pa
+
+from etoile_baac import DIMENSIONS, TABLE_FAITS, joindre_etoile, tranche_etoile
+
+
+def partition(annee, lignes):
+    # Faits d'une année reliés à une ligne de chaque dimension sur deux
+    cles = pa.array([i // 2 for i in range(lignes)], pa.int32())
+    tables = {TABLE_FAITS: pa.table({"grav": list(range(lignes)), **{cle: cles for cle, _ in DIMENSIONS.values()}})}
+    for nom in DIMENSIONS:
+        tables[nom] = pa.table({f"code_{nom}": [annee * 100 + i for i in range(lignes)]})
+    return tables
+
+
+def test_tranche_identique_a_la_vue_entiere():
+    etoile = {2022: partition(2022, 7), 2023: partition(2023, 5)}
+    vue = joindre_etoile(etoile)
+    for debut, fin in [(0, 3), (5, 9), (7, 12), (11, 20), (0, 12), (12, 15)]:
+        tranche = joindre_etoile(tranche_etoile(etoile, debut, fin))
+        attendue = vue.slice(debut, max(min(fin, vue.num_rows) - debut, 0))
+        assert tranche.num_rows == attendue.num_rows
+        if attendue.num_rows:
+            assert tranche.equals(attendue)
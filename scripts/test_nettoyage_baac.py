@@ -0,0 +1,117 @@
+# =====================================================================
+# CONSTRUCTION D'UNE ANNÉE AU FORMAT ANTÉRIEUR À 2019
+# =====================================================================
+# Fichiers séparés par des virgules en latin-1, heure HHMM, année sur
+# deux chiffres, coordonnées entières (colonne gps), pas d'id_vehicule
+# ni d'id_usager (usagers reliés aux véhicules par num_veh), lieux sans
+# vma mais avec env1 : l'année doit se construire jusqu'aux faits.
+import pandas as pd
+
+from etoile_baac import joindre_partition
+from Nettoyage_BAAC import chemin_partition, construire_annees
+from schema_baac import vers_pandas
+
+BRUTS_2018 = {
+    "caract": pd.DataFrame({
+        "Num_Acc": [201800000001, 201800000002, 201800000003],
+        "an": [18, 18, 18],
+        "mois": [1, 6, 12],
+        "jour": [5, 15, 31],
+        "hrmn": ["830", "1415", "2359"],
+        "lum": [1, 1, 3],
+        "agg": [2, 1, 2],
+        "int": [1, 1, 2],
+        "atm": [1, 2, 1],
+        "col": [3, 6, 1],
+        "com": ["056", "123", "001"],
+        "adr": ["rue de l'église", "", "place Léon Blum"],
+        "gps": ["M", "M", "M"],
+        "lat": ["4885660", "4590040", ""],
+        "long": ["235220", "200000", ""],
+        "dep": ["750", "630", "130"],
+    }),
+    "lieux": pd.DataFrame({
+        "Num_Acc": [201800000001, 201800000002, 201800000003],
+        "catr": [4, 3, 1],
+        "voie": ["", "12", "7"],
+        "v1": [0, 0, 0],
+        "v2": ["", "", ""],
+        "circ": [2, 2, 3],
+        "nbv": [2, 2, 4],
+        "pr": ["", "", ""],
+        "pr1": ["", "", ""],
+        "vosp": [0, 0, 0],
+        "prof": [1, 1, 1],
+        "plan": [1, 2, 1],
+        "lartpc": ["", "", ""],
+        "larrout": ["", "", ""],
+        "surf": [1, 2, 1],
+        "infra": [0, 0, 0],
+        "situ": [1, 1, 1],
+        "env1": [99, 0, 99],
+    }),
+    "vehicules": pd.DataFrame({
+        "Num_Acc": [201800000001, 201800000001, 201800000002, 201800000003],
+        "senc": [1, 2, 1, 1],
+        "catv": [7, 2, 7, 33],
+        "occutc": ["", "", "", ""],
+        "obs": [0, 0, 1, 0],
+        "obsm": [2, 2, 0, 2],
+        "choc": [1, 3, 1, 2],
+        "manv": [1, 2, 13, 1],
+        "num_veh": ["A01", "B01", "A01", "A01"],
+    }),
+    "usagers": pd.DataFrame({
+        "Num_Acc": [201800000001, 201800000001, 201800000001, 201800000002, 201800000003],
+        "place": [1, 1, 2, 1, 1],
+        "catu": [1, 1, 2, 1, 1],
+        "grav": [1, 3, 4, 2, 4],
+        "sexe": [1, 2, 2, 1, 1],
+        "trajet": [5, 1, 0, 4, 5],
+        "secu": [11, 21, 11, 11, 13],
+        "locp": [0, 0, 0, 0, 0],
+        "actp": [0, 0, 0, 0, 0],
+        "etatp": [0, 0, 0, 0, 0],
+        "an_nais": [1980, 2001, 2010, 1955, 1990],
+        "num_veh": ["A01", "B01", "B01", "A01", "A01"],
+    }),
+}
+
+
+# Noms des fichiers publiés pour les anciens millésimes
+FICHIERS_2018 = {
+    "caract": "caracteristiques_2018.csv",
+    "lieux": "lieux_2018.csv",
+    "vehicules": "vehicules_2018.csv",
+    "usagers": "usagers_2018.csv",
+}
+
+
+def ecrire_bruts(dossier):
+    for table, df in BRUTS_2018.items():
+        df.to_csv(dossier / FICHIERS_2018[table], sep=",", index=False, encoding="latin-1")
+
+
+def test_annee_avant_2019(tmp_path):
+    brut, sortie = tmp_path / "brut", tmp_path / "sortie"
+    brut.mkdir()
+    ecrire_bruts(brut)
+
+    recalculees = construire_annees([2018], str(brut), str(sortie), workers=1)
+    assert sorted(recalculees[2018]) == ["caract", "faits", "lieux", "usagers", "vehicules"]
+
+    vue = vers_pandas(joindre_partition(chemin_partition(str(sortie), 2018)))
+    assert len(vue) == 5
+    assert vue["an"].tolist() == [2018] * 5
+    assert vue["hrmn"].tolist() == ["08:30", "08:30", "08:30", "14:15", "23:59"]
+    assert vue["periode"].astype(str).tolist() == ["Matin", "Matin", "Matin", "Après-midi", "Soir"]
+    # Jointure usager -> véhicule sur Num_Acc + num_veh
+    assert vue["catv"].tolist() == [7, 2, 2, 7, 33]
+    # Coordonnées entières en degrés x 100 000
+    assert round(float(vue["lat"].iloc[0]), 4) == 48.8566
+    assert vue["coord_valide"].tolist() == [True, True, True, True, False]
+    # Pas de vma avant 2019 : variables qui en dépendent manquantes
+    assert vue["vma"].isna().all()
+    assert vue["zone_detaillee"].isna().all()
+    assert vue["niveau_vitesse"].isna().all()
+    assert "env1" not in vue.columns
@@ -0,0 +1,26 @@
+# =====================================================================
+# TYPES DES COLONNES VALIDÉES
+# =====================================================================
+import pandas as pd
+
+from regles_baac import valider_table
+from schema_baac import TYPES_CODES
+
+
+def test_validation_garde_le_schema_compact():
+    # Les codes sortent dans leur type compact, les identifiants en Int64
+    df = pd.DataFrame({
+        "Num_Acc": ["202300000001", "202300000002"],
+        "grav": pd.array([2, 5], dtype="Int8"),
+        "an_nais": pd.array([1980, 0], dtype="Int16"),
+        "place": ["1", "x"],
+    })
+    valide, rapport = valider_table(df, "usagers")
+
+    assert str(valide["Num_Acc"].dtype) == "Int64"
+    for colonne in ["grav", "an_nais", "place"]:
+        assert str(valide[colonne].dtype) == TYPES_CODES[colonne]
+    assert valide["grav"].isna().tolist() == [False, True]
+    assert valide["an_nais"].isna().tolist() == [False, True]
+    assert valide["place"].isna().tolist() == [False, True]
+    assert rapport.set_index(["colonne", "regle"]).loc[("grav", "plage"), "violations"] == 1
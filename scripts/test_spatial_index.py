@@ -0,0 +1,35 @@
+# ======================================================
+# SPATIAL INDEX — RADIUS QUERIES AGAINST A FULL SCAN
+# ======================================================
+
+import numpy as np
+
+from spatial_index import EARTH_RADIUS_KM, build_spatial_index, query_radius
+
+
+def brute_force_radius(lat, lon, center_lat, center_lon, radius_km):
+    phi1 = np.radians(center_lat)
+    phi2 = np.radians(lat.astype(np.float64))
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon.astype(np.float64) - center_lon) / 2) ** 2
+    )
+    return np.flatnonzero(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0))) <= radius_km)
+
+
+def test_point_just_inside_the_radius():
+    # 99.99 km due north: outside a box sized with 111.32 km per degree
+    index = build_spatial_index(np.array([45.9004], dtype=np.float32), np.array([2.0], dtype=np.float32))
+    assert query_radius(index, 45.0012, 2.0, 100).tolist() == [0]
+
+
+def test_radius_matches_full_scan():
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(41, 51.5, 50_000).astype(np.float32)
+    lon = rng.uniform(-5.5, 10, 50_000).astype(np.float32)
+    index = build_spatial_index(lat, lon)
+    for _ in range(200):
+        center_lat, center_lon = rng.uniform(40, 53), rng.uniform(-6, 11)
+        radius_km = rng.choice([1, 5, 20, 100, 300])
+        expected = brute_force_radius(lat, lon, center_lat, center_lon, radius_km)
+        np.testing.assert_array_equal(query_radius(index, center_lat, center_lon, radius_km), expected)
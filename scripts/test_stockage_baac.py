@@ -0,0 +1,34 @@
+# =====================================================================
+# EXPORT DES TABLES PENDANT QU'ELLES SONT LUES
+# =====================================================================
+import numpy as np
+import pandas as pd
+
+from stockage_baac import exporter_par_blocs, exporter_table, lire_table, ouvrir_table
+
+
+def test_reecriture_arrow_ouverte_en_memory_map(tmp_path):
+    # L'application garde les tables ouvertes pendant qu'une année est
+    # reconstruite : la lecture doit continuer sur l'ancien fichier
+    chemin = tmp_path / "faits"
+    exporter_table(pd.DataFrame({"x": np.arange(1_000_000)}), chemin, "arrow")
+    ancienne = ouvrir_table(chemin)
+
+    exporter_table(pd.DataFrame({"x": np.arange(10)}), chemin, "arrow")
+    assert int(ancienne.column("x").to_numpy()[-1]) == 999_999
+    assert ouvrir_table(chemin).num_rows == 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["faits.arrow"]
+
+
+def test_export_par_blocs_au_format_demande(tmp_path):
+    # Le mode --blocs doit produire la même table que l'export d'un coup
+    df = pd.DataFrame({
+        "Num_Acc": pd.array([202300000001, 202300000002, 202300000003], dtype="Int64"),
+        "catv": pd.array([7, None, 33], dtype="Int8"),
+    })
+    exporter_table(df, tmp_path / "entier", "arrow")
+    chemin, lignes = exporter_par_blocs((df.iloc[:2], df.iloc[2:]), tmp_path / "blocs", "arrow")
+
+    assert (chemin.name, lignes) == ("blocs.arrow", 3)
+    pd.testing.assert_frame_equal(lire_table(tmp_path / "blocs"), lire_table(tmp_path / "entier"))
+    assert str(lire_table(tmp_path / "blocs")["Num_Acc"].dtype) == "Int64"
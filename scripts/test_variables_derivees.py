@@ -0,0 +1,132 @@
+# =====================================================================
+# PARITÉ DES VARIABLES DÉRIVÉES AVEC LES FONCTIONS LIGNE À LIGNE
+# =====================================================================
+# Les fonctions ci-dessous sont celles de l'ancien Nettoyage_BAAC.py,
+# appliquées avec .apply : chaque variable vectorisée doit produire les
+# mêmes libellés, valeurs manquantes comprises, sur toutes les branches.
+import numpy as np
+import pandas as pd
+import pytest
+
+from variables_derivees import calculer_variable
+
+
+def periode_journee(h):
+    if "00:00" <= h < "06:00":
+        return "Nuit"
+    elif "06:00" <= h < "12:00":
+        return "Matin"
+    elif "12:00" <= h < "18:00":
+        return "Après-midi"
+    else:
+        return "Soir"
+
+
+def gravite_3_niveaux(grav):
+    if pd.isna(grav):
+        return None
+    elif grav == 2:
+        return "Tué"
+    elif grav == 3:
+        return "Blessé hospitalisé"
+    elif grav in [1, 4]:
+        return "Indemne"
+    else:
+        return None
+
+
+def tranche_age(a):
+    if pd.isna(a):
+        return None
+    elif a < 18:
+        return "Mineur"
+    elif a < 25:
+        return "18–24"
+    elif a < 40:
+        return "25–39"
+    elif a < 60:
+        return "40–59"
+    else:
+        return "60+"
+
+
+def zone_detaillee(agg, catr, vma):
+    if pd.isna(agg) or pd.isna(vma):
+        return None
+    elif catr == 1 or vma >= 90:
+        return "Autoroute"
+    elif agg == 2 and vma <= 50:
+        return "Zone urbaine dense"
+    elif agg == 1 and vma <= 80:
+        return "Zone rurale"
+    else:
+        return "Autre"
+
+
+def niveau_vitesse(v):
+    if pd.isna(v):
+        return None
+    elif v <= 30:
+        return "Faible"
+    elif v <= 70:
+        return "Moyenne"
+    else:
+        return "Élevée"
+
+
+def comparer(calculee, attendue):
+    """Compare libellé par libellé, NA (None/NaN) d'un côté comme de l'autre."""
+    calculee = calculee.astype(object).where(calculee.notna(), None).tolist()
+    attendue = attendue.astype(object).where(attendue.notna(), None).tolist()
+    assert calculee == attendue
+
+
+@pytest.fixture
+def lieux():
+    # Toutes les branches de zone_detaillee et niveau_vitesse, bornes et NA compris
+    agg = [1, 1, 2, 2, 2, 1, 1, None, 2, 1, 2, 1]
+    catr = [1, 3, 3, 3, 4, 3, None, 3, 3, 3, None, 4]
+    vma = [30, 90, 50, 51, 30, 80, 81, 50, None, 70, 110, 31]
+    return pd.DataFrame({
+        "agg": pd.array(agg, dtype="Int8"),
+        "catr": pd.array(catr, dtype="Int8"),
+        "vma": pd.array(vma, dtype="Int16"),
+    })
+
+
+def test_periode():
+    hrmn = ["00:00", "05:59", "06:00", "11:59", "12:00", "17:59", "18:00", "23:59"]
+    df = pd.DataFrame({"hrmn": pd.array(hrmn, dtype="string")})
+    comparer(calculer_variable(df, "periode"), df["hrmn"].apply(periode_journee))
+
+
+def test_periode_heure_manquante():
+    # L'ancienne fonction échouait sur une heure manquante : NA attendu
+    df = pd.DataFrame({"hrmn": pd.array(["08:30", None], dtype="string")})
+    comparer(calculer_variable(df, "periode"), pd.Series(["Matin", None]))
+
+
+def test_gravite():
+    df = pd.DataFrame({"grav": pd.array([1, 2, 3, 4, None, 5], dtype="Int8")})
+    comparer(calculer_variable(df, "grav_3_niveaux"), df["grav"].apply(gravite_3_niveaux))
+
+
+def test_tranche_age():
+    age = [0, 17, 18, 24, 25, 39, 40, 59, 60, 102, None]
+    df = pd.DataFrame({"age": pd.array(age, dtype="Int16")})
+    comparer(calculer_variable(df, "tranche_age"), df["age"].astype("float64").apply(tranche_age))
+
+
+def test_tranche_age_decimale():
+    df = pd.DataFrame({"age": [17.5, 24.9, 59.99, np.nan]})
+    comparer(calculer_variable(df, "tranche_age"), df["age"].apply(tranche_age))
+
+
+def test_zone_detaillee(lieux):
+    # L'ancien code lisait ces colonnes depuis un CSV : des float, NA = NaN
+    attendue = lieux.astype("float64").apply(lambda x: zone_detaillee(x["agg"], x["catr"], x["vma"]), axis=1)
+    comparer(calculer_variable(lieux, "zone_detaillee"), attendue)
+
+
+def test_niveau_vitesse(lieux):
+    comparer(calculer_variable(lieux, "niveau_vitesse"), lieux["vma"].astype("float64").apply(niveau_vitesse))
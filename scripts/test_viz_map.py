@@ -0,0 +1,27 @@
+# ======================================================
+# SPATIAL BINNING — CELL MEMBERSHIP OF A MAP SELECTION
+# ======================================================
+
+import numpy as np
+
+from viz_map import grid_bins, in_cells
+
+
+def test_points_of_selected_cells():
+    # A lasso selects scattered cells: only their points are kept, not the
+    # points of the cells between them
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(41, 51.5, 20_000)
+    lon = rng.uniform(-5.5, 10, 20_000)
+    for cell_km in (1, 5, 20):
+        cells = grid_bins(lat, lon, np.arange(lat.size), cell_km)
+        selected = cells.iloc[::7]
+        inside = in_cells(lat, lon, selected["lat"].to_numpy(), selected["lon"].to_numpy(), cell_km)
+        assert inside.sum() == selected["accidents"].sum()
+        assert grid_bins(lat, lon, np.flatnonzero(inside), cell_km)[["lat", "lon"]].equals(
+            selected[["lat", "lon"]].reset_index(drop=True)
+        )
+
+
+def test_no_selected_cell():
+    assert not in_cells(np.array([45.0]), np.array([2.0]), np.empty(0), np.empty(0), 5).any()
@@ -0,0 +1,86 @@
+# ======================================================
+# TEXT MINING — ARTICLE WORDCLOUD
+# ======================================================
+# The article is tokenized, stripped of French stopwords and counted
+# once per content hash; the word cloud is rendered from those counts
+# (WordCloud.generate_from_frequencies) for a given set of rendering
+# parameters. The app caches both steps on (hash, parameters), so an
+# edited article.txt is picked up on the next run without a notebook.
+
+import hashlib
+import io
+import re
+from collections import Counter
+
+try:
+    from wordcloud import WordCloud
+except ImportError:
+    WordCloud = None
+
+# Lowercase words, hyphenated compounds kept whole; apostrophes split
+# elisions ("l'article" -> "l", "article") and digits are dropped
+WORD_PATTERN = re.compile(r"[a-zà-öø-ÿœæ]+(?:-[a-zà-öø-ÿœæ]+)*")
+MIN_WORD_LENGTH = 3
+
+# Copy of nltk.corpus.stopwords.words("french"), used when NLTK or its
+# stopwords corpus is not installed (no download at app runtime)
+FALLBACK_STOPWORDS = frozenset(
+    """
+    au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me même mes moi
+    mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos
+    votre vous c d j l à m n s t y été étée étées étés étant étante étants étantes suis es est sommes êtes
+    sont serai seras sera serons serez seront serais serait serions seriez seraient étais était étions
+    étiez étaient fus fut fûmes fûtes furent sois soit soyons soyez soient fusse fusses fût fussions
+    fussiez fussent ayant ayante ayantes ayants eu eue eues eus ai as avons avez ont aurai auras aura
+    aurons aurez auront aurais aurait aurions auriez auraient avais avait avions aviez avaient eut eûmes
+    eûtes eurent aie aies ait ayons ayez aient eusse eusses eût eussions eussiez eussent
+    """.split()
+)
+
+WORDCLOUD_DEFAULTS = {
+    "width": 800,
+    "height": 400,
+    "max_words": 100,
+    "background_color": "white",
+    "colormap": "Reds",
+}
+
+
+def french_stopwords():
+    """NLTK French stopwords, or FALLBACK_STOPWORDS if the corpus is unavailable."""
+    try:
+        from nltk.corpus import stopwords
+
+        return frozenset(stopwords.words("french"))
+    except (ImportError, LookupError):
+        return FALLBACK_STOPWORDS
+
+
+def text_digest(text):
+    """Content hash of a text, used as its cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def word_frequencies(text, stopwords=None, min_length=MIN_WORD_LENGTH):
+    """Counts of the words of `text`, stopwords and short words removed, most frequent first."""
+    stopwords = french_stopwords() if stopwords is None else stopwords
+    counts = Counter(
+        word for word in tokenize(text) if len(word) >= min_length and word not in stopwords
+    )
+    return dict(counts.most_common())
+
+
+def render_wordcloud(frequencies, **options):
+    """PNG bytes of the word cloud of `frequencies` (options override WORDCLOUD_DEFAULTS)."""
+    if WordCloud is None:
+        raise RuntimeError("Le paquet wordcloud n'est pas installé.")
+    if not frequencies:
+        raise ValueError("Aucun mot à représenter.")
+    cloud = WordCloud(**{**WORDCLOUD_DEFAULTS, **options}).generate_from_frequencies(frequencies)
+    buffer = io.BytesIO()
+    cloud.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,104 @@
+# =====================================================================
+# VARIABLES DÉRIVÉES (CALCUL VECTORISÉ)
+# =====================================================================
+# Chaque variable est décrite par des bornes, une table de correspondance
+# ou une liste de conditions, puis évaluée en une passe sur toute la
+# colonne (pd.cut / map / np.select) au lieu d'un .apply ligne à ligne.
+import numpy as np
+import pandas as pd
+
+ORDRE_PERIODE = ["Matin", "Après-midi", "Soir", "Nuit"]
+ORDRE_GRAVITE = ["Indemne", "Blessé hospitalisé", "Tué"]
+ORDRE_TRANCHE_AGE = ["Mineur", "18–24", "25–39", "40–59", "60+"]
+ORDRE_ZONE = ["Autoroute", "Zone urbaine dense", "Zone rurale", "Autre"]
+ORDRE_VITESSE = ["Faible", "Moyenne", "Élevée"]
+
+
+VARIABLES_DERIVEES = {
+    # Heure "HH:MM" comparée comme texte, comme dans le notebook
+    "periode": {
+        "methode": "conditions",
+        "manquant_si": ["hrmn"],
+        "conditions": [
+            ("Nuit", lambda d: (d["hrmn"] >= "00:00") & (d["hrmn"] < "06:00")),
+            ("Matin", lambda d: (d["hrmn"] >= "06:00") & (d["hrmn"] < "12:00")),
+            ("Après-midi", lambda d: (d["hrmn"] >= "12:00") & (d["hrmn"] < "18:00")),
+        ],
+        "defaut": "Soir",
+        "ordre": ORDRE_PERIODE,
+    },
+    # Blessé léger (4) regroupé avec indemne (1), cf. bulletin BAAC
+    "grav_3_niveaux": {
+        "methode": "correspondance",
+        "source": "grav",
+        "valeurs": {1: "Indemne", 2: "Tué", 3: "Blessé hospitalisé", 4: "Indemne"},
+        "ordre": ORDRE_GRAVITE,
+    },
+    "tranche_age": {
+        "methode": "intervalles",
+        "source": "age",
+        "bornes": [-np.inf, 18, 25, 40, 60, np.inf],
+        "droite": False,
+        "ordre": ORDRE_TRANCHE_AGE,
+    },
+    "zone_detaillee": {
+        "methode": "conditions",
+        "manquant_si": ["agg", "vma"],
+        "conditions": [
+            ("Autoroute", lambda d: (d["catr"] == 1) | (d["vma"] >= 90)),
+            ("Zone urbaine dense", lambda d: (d["agg"] == 2) & (d["vma"] <= 50)),
+            ("Zone rurale", lambda d: (d["agg"] == 1) & (d["vma"] <= 80)),
+        ],
+        "defaut": "Autre",
+        "ordre": ORDRE_ZONE,
+    },
+    "niveau_vitesse": {
+        "methode": "intervalles",
+        "source": "vma",
+        "bornes": [-np.inf, 30, 70, np.inf],
+        "droite": True,
+        "ordre": ORDRE_VITESSE,
+    },
+}
+
+
+def _masque(condition):
+    """Convertit un résultat de comparaison (éventuellement nullable) en booléens numpy."""
+    return pd.Series(condition).fillna(False).to_numpy(dtype=bool)
+
+
+def calculer_variable(df, nom):
+    """Calcule une variable dérivée sur tout le DataFrame et renvoie une Series category."""
+    definition = VARIABLES_DERIVEES[nom]
+    methode = definition["methode"]
+
+    if methode == "intervalles":
+        valeurs = pd.to_numeric(df[definition["source"]], errors="coerce").astype("float64")
+        return pd.cut(
+            valeurs,
+            bins=definition["bornes"],
+            labels=definition["ordre"],
+            right=definition["droite"],
+        ).rename(nom)
+
+    if methode == "correspondance":
+        valeurs = df[definition["source"]].map(definition["valeurs"])
+    else:
+        labels = [label for label, _ in definition["conditions"]]
+        masques = [_masque(condition(df)) for _, condition in definition["conditions"]]
+        valeurs = pd.Series(np.select(masques, labels, default=definition["defaut"]), index=df.index)
+        manquant = df[definition["manquant_si"]].isna().any(axis=1)
+        valeurs = valeurs.mask(manquant)
+
+    return pd.Series(
+        pd.Categorical(valeurs, categories=definition["ordre"], ordered=True),
+        index=df.index,
+        name=nom,
+    )
+
+
+def ajouter_variables(df, noms):
+    """Ajoute les variables dérivées demandées au DataFrame (modifié sur place)."""
+    for nom in noms:
+        df[nom] = calculer_variable(df, nom)
+    return df
@@ -0,0 +1,181 @@
+# ======================================================
+# OLAP CUBE — VISUALISATION PAGE
+# ======================================================
+# Every chart and filter of the viz page only needs counts over a handful
+# of label columns. The cube stores one row per observed combination of
+# those dimensions with its number of usagers, so widget interactions
+# slice and sum a few thousand rows instead of regrouping the raw table.
+
+import numpy as np
+import pandas as pd
+
+from variables_derivees import ORDRE_PERIODE, ORDRE_TRANCHE_AGE, ORDRE_VITESSE
+
+CUBE_DIMENSIONS = [
+    "sexe_label",
+    "grav_3_niveaux",
+    "zone_detaillee",
+    "age",
+    "tranche_age",
+    "periode",
+    "niveau_vitesse",
+]
+SEVERE_LEVELS = ["Tué", "Blessé hospitalisé"]
+# Above this many possible cells, sort the keys instead of a dense bincount
+DENSE_CELL_LIMIT = 50_000_000
+
+
+def _dimension_codes(series):
+    """Integer codes of a column (0 = missing) and the values they stand for."""
+    categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+    return categorical.cat.codes.to_numpy(dtype=np.int64) + 1, categorical.cat.categories
+
+
+def build_cube(dataframe):
+    """
+    Count usagers per combination of CUBE_DIMENSIONS (missing values kept as their own cell).
+
+    Each dimension is reduced to its category codes, the codes are folded
+    into a single integer key per row and counted with np.bincount, which
+    stays linear in the number of rows on the full multi-year table.
+    """
+    dims = [dim for dim in CUBE_DIMENSIONS if dim in dataframe.columns]
+    codes, categories = zip(*(_dimension_codes(dataframe[dim]) for dim in dims))
+    sizes = tuple(len(cats) + 1 for cats in categories)
+
+    keys = np.ravel_multi_index(codes, sizes)
+    if np.prod(sizes, dtype=np.int64) <= DENSE_CELL_LIMIT:
+        counts = np.bincount(keys)
+        cells = np.flatnonzero(counts)
+        counts = counts[cells]
+    else:
+        cells, counts = np.unique(keys, return_counts=True)
+
+    cube = {}
+    for dim, cell_codes, cats in zip(dims, np.unravel_index(cells, sizes), categories):
+        values = pd.Categorical.from_codes(cell_codes - 1, categories=cats)
+        source_dtype = dataframe[dim].dtype
+        if isinstance(source_dtype, pd.CategoricalDtype):
+            cube[dim] = pd.Categorical(values, dtype=source_dtype)
+        else:
+            cube[dim] = pd.Series(values).astype(object).astype(source_dtype)
+    cube["count"] = counts
+    return pd.DataFrame(cube)
+
+
+def cube_total(cube):
+    return int(cube["count"].sum())
+
+
+def cube_counts(cube, by, name="accidents"):
+    """Equivalent of rows.dropna(subset=by).groupby(by).size() answered from the cube."""
+    return (
+        cube.dropna(subset=by)
+        .groupby(by, observed=True)["count"]
+        .sum()
+        .reset_index(name=name)
+    )
+
+
+def severity_summary(cube, by):
+    """Total and severe (killed / hospitalised) counts per value of `by`, with their share."""
+    cells = cube.dropna(subset=[by, "grav_3_niveaux"])
+    severe = cells["count"].where(cells["grav_3_niveaux"].isin(SEVERE_LEVELS), 0)
+    return (
+        cells.assign(graves=severe)
+        .groupby(by, observed=True)
+        .agg(total=("count", "sum"), graves=("graves", "sum"))
+        .reset_index()
+        .assign(part_graves=lambda x: x["graves"] / x["total"])
+    )
+
+
+# ------------------------------------------------------
+# CHART DATA
+# ------------------------------------------------------
+# One builder per chart of the viz page, taking the filtered cube cells.
+# Results may be shared between sessions: builders return new frames and
+# callers must not modify them.
+# Same orders as the ordered categories of the stored table (schema_baac)
+AGE_ORDER = ORDRE_TRANCHE_AGE
+PERIOD_ORDER = ORDRE_PERIODE
+SPEED_ORDER = ORDRE_VITESSE
+
+
+def gravity_counts(cells):
+    return cube_counts(cells, ["grav_3_niveaux"])
+
+
+def sex_counts(cells):
+    return cube_counts(cells, ["sexe_label"])
+
+
+def sex_gravity_share(cells):
+    return cube_counts(cells, ["sexe_label", "grav_3_niveaux"]).assign(
+        part=lambda x: x["accidents"] / x.groupby("sexe_label", observed=True)["accidents"].transform("sum")
+    )
+
+
+def age_gravity_counts(cells):
+    return (
+        cube_counts(cells, ["tranche_age", "grav_3_niveaux"])
+        .assign(tranche_age=lambda x: pd.Categorical(x["tranche_age"], categories=AGE_ORDER, ordered=True))
+        .sort_values("tranche_age")
+    )
+
+
+def night_share_by_age(cells):
+    # Ensure every paire (tranche_age, période) exists so percentages remain correct even after filtering.
+    nuit_index = pd.MultiIndex.from_product([AGE_ORDER, PERIOD_ORDER], names=["tranche_age", "periode"])
+    night_counts = (
+        cube_counts(cells, ["tranche_age", "periode"])
+        .astype({"tranche_age": str, "periode": str})
+        .set_index(["tranche_age", "periode"])["accidents"]
+        .reindex(nuit_index, fill_value=0)
+        .reset_index(name="accidents")
+    )
+    total_by_age = night_counts.groupby("tranche_age")["accidents"].sum().reset_index(name="total")
+    return (
+        night_counts.merge(total_by_age, on="tranche_age")
+        .assign(part=lambda x: x["accidents"] / x["total"])
+        .pipe(lambda df: df[df["periode"] == "Nuit"])
+        .sort_values("part", ascending=False)
+    )
+
+
+def period_zone_counts(cells):
+    periode_data = cube_counts(cells, ["periode", "zone_detaillee"]).astype({"periode": str, "zone_detaillee": str})
+    zone_categories = sorted(periode_data["zone_detaillee"].unique().tolist())
+    periode_index = pd.MultiIndex.from_product(
+        [PERIOD_ORDER, zone_categories or ["Zone inconnue"]],
+        names=["periode", "zone_detaillee"],
+    )
+    return (
+        periode_data.set_index(["periode", "zone_detaillee"])["accidents"]
+        .reindex(periode_index, fill_value=0)
+        .reset_index(name="accidents")
+    )
+
+
+def zone_severity(cells):
+    return severity_summary(cells, "zone_detaillee").astype({"zone_detaillee": str})
+
+
+def speed_severity(cells):
+    return (
+        severity_summary(cells, "niveau_vitesse")
+        .assign(niveau_vitesse=lambda x: pd.Categorical(x["niveau_vitesse"], categories=SPEED_ORDER, ordered=True))
+        .sort_values("niveau_vitesse")
+    )
+
+
+CHART_DATA = {
+    "gravity": gravity_counts,
+    "sex": sex_counts,
+    "sex_gravity": sex_gravity_share,
+    "age_gravity": age_gravity_counts,
+    "night_by_age": night_share_by_age,
+    "period_zone": period_zone_counts,
+    "zone_severity": zone_severity,
+    "speed_severity": speed_severity,
+}
@@ -0,0 +1,200 @@
+# ======================================================
+# FIGURES — VISUALISATION PAGE
+# ======================================================
+# Each viz chart is drawn with plotly.graph_objects straight from its
+# aggregated frame (a few rows of labels and counts), on one branded
+# template object built once at import. Figures are cached by the app
+# with the aggregations, so an unchanged (chart, filter state) pair is
+# neither re-aggregated nor re-drawn on rerun.
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from viz_cube import AGE_ORDER, PERIOD_ORDER, SPEED_ORDER
+
+# -----------------------------------------------------
+# BRANDING — Inspired by Les Echos
+# -----------------------------------------------------
+BRAND_PRIMARY = "#B21807"
+BRAND_SECONDARY = "#63150C"
+BRAND_ACCENT = "#D9B28C"
+BRAND_DARK = "#1F1F1F"
+BRAND_LIGHT = "#F7F3EE"
+BRAND_NEUTRAL = "#D9D4CE"
+BRAND_CHART_SEQUENCE = [
+    "#B21807",
+    "#D94F30",
+    "#E88A64",
+    "#5C5C5C",
+]
+BRAND_BAR_SEQUENCE = [
+    "#B21807",
+    "#C53020",
+    "#D94F30",
+    "#E47354",
+    "#EF9B79",
+    "#F3B892",
+    "#7E2B18",
+    "#A64E3D",
+    "#CC6E58",
+    "#F7D6C2",
+]
+
+BRAND_TEMPLATE = go.layout.Template(pio.templates["simple_white"])
+BRAND_TEMPLATE.layout.update(
+    title_text="",
+    legend_title_text="",
+    font=dict(family="Georgia, 'Times New Roman', serif", color=BRAND_DARK, size=14),
+    title_font=dict(size=24, family="Playfair Display, Georgia, serif", color=BRAND_DARK),
+    plot_bgcolor="#FFFFFF",
+    paper_bgcolor="#FFFFFF",
+    bargap=0.2,
+    margin=dict(t=60, b=40, l=40, r=30),
+    xaxis=dict(showgrid=False, linecolor=BRAND_NEUTRAL),
+    yaxis=dict(showgrid=True, gridcolor="#EFE8E1", zerolinecolor="#EFE8E1"),
+    coloraxis_colorbar=dict(title=""),
+)
+
+
+def palette(sequence, count):
+    """`count` colours cycling through `sequence`."""
+    return [sequence[i % len(sequence)] for i in range(count)]
+
+
+def _figure(traces, **layout):
+    return go.Figure(data=traces, layout=go.Layout(template=BRAND_TEMPLATE, **layout))
+
+
+def _pie(data, names, hole, colors):
+    return _figure([
+        go.Pie(
+            labels=data[names].astype(str).tolist(),
+            values=data["accidents"].tolist(),
+            marker_colors=palette(colors, len(data)),
+            hole=hole,
+            textposition="inside",
+        )
+    ])
+
+
+def _bars_by(data, x, y, color, colors):
+    """One bar trace per value of `color`, in order of appearance (as plotly express does)."""
+    groups = data[color].astype(str)
+    values = list(dict.fromkeys(groups))
+    return [
+        go.Bar(
+            x=data.loc[groups == value, x].astype(str).tolist(),
+            y=data.loc[groups == value, y].tolist(),
+            name=value,
+            marker_color=colour,
+        )
+        for value, colour in zip(values, palette(colors, len(values)))
+    ]
+
+
+def gravity_figure(data):
+    return _pie(data, "grav_3_niveaux", 0.15, BRAND_CHART_SEQUENCE)
+
+
+def sex_figure(data):
+    return _pie(data, "sexe_label", 0.2, BRAND_CHART_SEQUENCE[:2])
+
+
+def sex_gravity_figure(data):
+    fig = _figure(
+        _bars_by(data, "sexe_label", "part", "grav_3_niveaux", BRAND_CHART_SEQUENCE),
+        barmode="group",
+        xaxis_title="Sexe",
+        yaxis_title="Part des accidents",
+        legend_title_text="Gravité",
+    )
+    fig.update_yaxes(tickformat=".0%")
+    return fig
+
+
+def age_gravity_figure(data):
+    return _figure(
+        _bars_by(data, "tranche_age", "accidents", "grav_3_niveaux", BRAND_CHART_SEQUENCE),
+        barmode="stack",
+        xaxis=dict(title="Tranches d'âge", categoryorder="array", categoryarray=AGE_ORDER),
+        yaxis_title="Nombre d'accidents",
+        legend_title_text="Gravité",
+    )
+
+
+def night_by_age_figure(data):
+    fig = _figure(
+        [
+            go.Bar(
+                x=data["tranche_age"].astype(str).tolist(),
+                y=data["part"].tolist(),
+                marker_color=palette(BRAND_BAR_SEQUENCE, len(data)),
+            )
+        ],
+        xaxis_title="Tranches d'âge",
+        yaxis_title="Part des accidents sur la période Nuit",
+        showlegend=False,
+    )
+    fig.update_yaxes(tickformat=".0%")
+    return fig
+
+
+def period_zone_figure(data):
+    return _figure(
+        _bars_by(data, "periode", "accidents", "zone_detaillee", BRAND_BAR_SEQUENCE),
+        barmode="relative",
+        xaxis=dict(title="Période", categoryorder="array", categoryarray=PERIOD_ORDER),
+        yaxis_title="Nombre d'accidents",
+        legend_title_text="Zone détaillée",
+    )
+
+
+def zone_severity_figure(data):
+    return _figure(
+        [
+            go.Treemap(
+                labels=data["zone_detaillee"].tolist(),
+                parents=[""] * len(data),
+                values=data["total"].tolist(),
+                marker=dict(colors=data["part_graves"].tolist(), coloraxis="coloraxis"),
+                branchvalues="total",
+            )
+        ],
+        margin=dict(t=50, l=0, r=0, b=0),
+        coloraxis=dict(
+            colorscale=[[0, BRAND_LIGHT], [1, BRAND_PRIMARY]],
+            cmid=float(data["part_graves"].mean()),
+            colorbar=dict(title="Part d'accidents graves", tickformat=".0%"),
+        ),
+    )
+
+
+def speed_severity_figure(data):
+    fig = _figure(
+        [
+            go.Scatter(
+                x=data["niveau_vitesse"].astype(str).tolist(),
+                y=data["part_graves"].tolist(),
+                mode="lines+markers",
+                line_color=BRAND_PRIMARY,
+            )
+        ],
+        xaxis=dict(title="Niveau de vitesse autorisée", categoryorder="array", categoryarray=SPEED_ORDER),
+        yaxis_title="Part d'accidents graves",
+        showlegend=False,
+    )
+    fig.update_yaxes(tickformat=".0%")
+    return fig
+
+
+# Same ids as viz_cube.CHART_DATA: each builder takes that chart's data
+CHART_FIGURES = {
+    "gravity": gravity_figure,
+    "sex": sex_figure,
+    "sex_gravity": sex_gravity_figure,
+    "age_gravity": age_gravity_figure,
+    "night_by_age": night_by_age_figure,
+    "period_zone": period_zone_figure,
+    "zone_severity": zone_severity_figure,
+    "speed_severity": speed_severity_figure,
+}
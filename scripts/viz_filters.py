@@ -0,0 +1,104 @@
+# ======================================================
+# FILTER ENGINE — VISUALISATION PAGE
+# ======================================================
+# Option lists and one boolean mask per filter value are computed once
+# for a frame (the count cube or the raw rows). A filter state is then
+# answered by OR-ing the masks of the selected values and AND-ing the
+# filters together; the resulting positions are memoized by state, so
+# reruns with unchanged filters do no work and nothing is copied.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from viz_cube import SEVERE_LEVELS
+
+MULTISELECT_FILTERS = {
+    "sexes": "sexe_label",
+    "gravities": "grav_3_niveaux",
+    "zones": "zone_detaillee",
+}
+MEMO_SIZE = 64
+
+
+def build_filter_index(frame):
+    """Precompute options and per-value masks for every viz filter of `frame`."""
+    index = {
+        "size": len(frame),
+        "options": {},
+        "masks": {},
+        "memo": OrderedDict(),
+        "lock": threading.Lock(),
+    }
+    for key, dim in MULTISELECT_FILTERS.items():
+        column = frame[dim] if isinstance(frame[dim].dtype, pd.CategoricalDtype) else frame[dim].astype("category")
+        codes = column.cat.codes.to_numpy()
+        masks = {}
+        for code, value in enumerate(column.cat.categories):
+            mask = codes == code
+            if mask.any():
+                mask.setflags(write=False)
+                masks[value] = mask
+        index["masks"][key] = masks
+        index["options"][key] = list(masks)
+
+    age = pd.to_numeric(frame["age"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    index["age"] = age
+    index["age_bounds"] = None if np.isnan(age).all() else (int(np.nanmin(age)), int(np.nanmax(age)))
+    index["night"] = frame["periode"].eq("Nuit").fillna(False).to_numpy(dtype=bool)
+    index["severe"] = frame["grav_3_niveaux"].isin(SEVERE_LEVELS).to_numpy(dtype=bool)
+    return index
+
+
+def filter_key(state):
+    """Hashable, order-independent form of a filter state."""
+    age_range = state.get("age_range")
+    return (
+        *(tuple(sorted(state.get(key) or ())) for key in MULTISELECT_FILTERS),
+        tuple(age_range) if age_range is not None else None,
+        bool(state.get("night_only")),
+        bool(state.get("severe_only")),
+    )
+
+
+def _compute_mask(index, state):
+    mask = np.ones(index["size"], dtype=bool)
+    for key in MULTISELECT_FILTERS:
+        selected = state.get(key)
+        if selected:
+            masks = [index["masks"][key][value] for value in selected if value in index["masks"][key]]
+            mask &= np.logical_or.reduce(masks) if masks else False
+    age_range = state.get("age_range")
+    if age_range is not None:
+        age = index["age"]
+        mask &= (age >= age_range[0]) & (age <= age_range[1])
+    if state.get("night_only"):
+        mask &= index["night"]
+    if state.get("severe_only"):
+        mask &= index["severe"]
+    return mask
+
+
+def select_positions(index, state):
+    """
+    Positions of the entries matching `state`, as a read-only array.
+
+    Multiselect filters only apply when a selection exists and, like the
+    original row filters, exclude entries where the dimension is missing.
+    """
+    key = filter_key(state)
+    with index["lock"]:
+        positions = index["memo"].get(key)
+        if positions is not None:
+            index["memo"].move_to_end(key)
+            return positions
+
+    positions = np.flatnonzero(_compute_mask(index, state))
+    positions.setflags(write=False)
+    with index["lock"]:
+        index["memo"][key] = positions
+        if len(index["memo"]) > MEMO_SIZE:
+            index["memo"].popitem(last=False)
+    return positions
@@ -0,0 +1,100 @@
+# ======================================================
+# SPATIAL BINNING — ACCIDENT MAP
+# ======================================================
+# Accident coordinates are aggregated server-side on a regular grid with
+# vectorised NumPy: the browser only receives one point per non-empty
+# cell (centre + count), whatever the number of accidents selected.
+
+import numpy as np
+import pandas as pd
+
+KM_PER_DEGREE = 111.32
+# Reference latitude used to convert kilometres into longitude degrees
+REFERENCE_LATITUDE = 46.5
+FRANCE_CENTER = {"lat": 46.6, "lon": 2.4}
+
+
+def valid_coordinates(lat, lon):
+    """Mask of usable coordinates: present, in range and not the (0, 0) placeholder."""
+    return (
+        np.isfinite(lat)
+        & np.isfinite(lon)
+        & (np.abs(lat) <= 90)
+        & (np.abs(lon) <= 180)
+        & ~((lat == 0) & (lon == 0))
+    )
+
+
+def coordinate_arrays(dataframe):
+    """
+    Latitude / longitude of a frame as float64 arrays (NaN when missing).
+
+    Rows flagged out of France by the cleaning pipeline (coord_valide) are
+    returned as NaN, so the map and spatial index skip them.
+    """
+    lat = pd.to_numeric(dataframe["lat"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    lon = pd.to_numeric(dataframe["longitude"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if "coord_valide" in dataframe.columns:
+        invalid = ~dataframe["coord_valide"].fillna(False).to_numpy(dtype=bool)
+        lat[invalid] = np.nan
+        lon[invalid] = np.nan
+    return lat, lon
+
+
+def grid_steps(cell_km):
+    """Latitude and longitude extent, in degrees, of a grid cell of about cell_km kilometres."""
+    return cell_km / KM_PER_DEGREE, cell_km / (KM_PER_DEGREE * np.cos(np.radians(REFERENCE_LATITUDE)))
+
+
+def grid_cells(lat, lon, cell_km):
+    """Row and column indices of the grid cell holding each point."""
+    step_lat, step_lon = grid_steps(cell_km)
+    return (
+        np.floor(np.asarray(lat, dtype=float) / step_lat).astype(np.int64),
+        np.floor(np.asarray(lon, dtype=float) / step_lon).astype(np.int64),
+    )
+
+
+def in_cells(lat, lon, cell_lat, cell_lon, cell_km):
+    """Mask of the points lying in one of the grid cells centred on (cell_lat, cell_lon)."""
+    row, col = grid_cells(lat, lon, cell_km)
+    cell_row, cell_col = grid_cells(cell_lat, cell_lon, cell_km)
+    if row.size == 0 or cell_row.size == 0:
+        return np.zeros(row.size, dtype=bool)
+    # Same key folding as grid_bins, over the columns of both point sets
+    col_offset = min(col.min(), cell_col.min())
+    width = int(max(col.max(), cell_col.max()) - col_offset + 1)
+    return np.isin(row * width + (col - col_offset), cell_row * width + (cell_col - col_offset))
+
+
+def grid_bins(lat, lon, positions, cell_km):
+    """
+    Count the selected points per grid cell of about cell_km kilometres.
+
+    Returns one row per non-empty cell with its centre (lat, lon) and count.
+    """
+    lat = lat[positions]
+    lon = lon[positions]
+    keep = valid_coordinates(lat, lon)
+    lat = lat[keep]
+    lon = lon[keep]
+    if lat.size == 0:
+        return pd.DataFrame({"lat": [], "lon": [], "accidents": []})
+
+    step_lat, step_lon = grid_steps(cell_km)
+    row, col = grid_cells(lat, lon, cell_km)
+
+    # Fold the two cell indices into one key and count keys
+    row_offset = row.min()
+    col_offset = col.min()
+    width = int(col.max() - col_offset + 1)
+    keys = (row - row_offset) * width + (col - col_offset)
+    cells, counts = np.unique(keys, return_counts=True)
+
+    cell_row = cells // width + row_offset
+    cell_col = cells % width + col_offset
+    return pd.DataFrame({
+        "lat": (cell_row + 0.5) * step_lat,
+        "lon": (cell_col + 0.5) * step_lon,
+        "accidents": counts,
+    })